@@ -1,5 +1,25 @@
 # -*- mode: python ; coding: utf-8 -*-
 
+# Builds the Tkinter window. PyInstaller also follows imports made inside
+# functions, so modules the Tk window never reaches (Qt, the sink, the metrics
+# exporter, multi-process mode and the requests-based legacy paths) are
+# excluded. A one-file build unpacks its whole archive on every launch, so
+# they would slow down every start. Measure with:
+#   python -m speed_monitor startup --frozen dist/active_speed_monitor
+excludes = [
+    'PyQt6',
+    'speed_monitor.gui.qt_app',
+    'speed_monitor.gui.live_graph',
+    'speed_monitor.sink_server',
+    'speed_monitor.metrics_exporter',
+    'speed_monitor.process_pool',
+    'speed_monitor.speed_cli',
+    'speed_monitor.speed_benchmark',
+    'speed_monitor.startup_benchmark',
+    'http.server',
+    'multiprocessing',
+    'requests',
+]
 
 a = Analysis(
     ['active_speed_monitor.py'],
@@ -10,7 +30,7 @@ a = Analysis(
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
-    excludes=[],
+    excludes=excludes,
     noarchive=False,
     optimize=0,
 )
@@ -0,0 +1,7 @@
+import sys
+from speed_monitor.sink_server import main
+
+# python sink_server.py [port] [processes]; same as `python -m speed_monitor sink`.
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,7 @@
+import sys
+from speed_monitor.speed_benchmark import main
+
+# Loopback throughput benchmark; same as `python -m speed_monitor benchmark`.
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,7 @@
+import sys
+from speed_monitor.speed_cli import main
+
+# Headless tests, JSON lines; same as `python -m speed_monitor cli`.
+
+if __name__ == "__main__":
+    sys.exit(main())
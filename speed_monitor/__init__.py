@@ -0,0 +1,5 @@
+# Internet speed monitor: measurement engine, headless CLI, upload sink and
+# the Tkinter/PyQt6 front ends (speed_monitor.gui).
+#
+# Nothing is imported here, so each entry point (see launcher.py) loads only
+# what it uses.
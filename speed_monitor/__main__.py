@@ -0,0 +1,7 @@
+import sys
+from .launcher import main
+
+# python -m speed_monitor [gui|tk|cli|sink|benchmark|startup] ...
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,245 @@
+import math
+import time
+from array import array
+from collections import deque
+
+RESOLUTION = 0.1  # Seconds per ring-buffer slot; chunks within a slot are merged
+WINDOWS = (2.0, 10.0)  # Sliding windows kept up to date on every sample
+HEADLINE_WINDOW = 2.0  # Window behind the rate shown in the UI
+EWMA_TAU = 1.0  # Seconds; time constant of the exponentially weighted average
+HIST_MIN_BPS = 1_000  # Lowest histogram bucket (1 kbps)
+HIST_GROWTH = 1.04  # Each histogram bucket is 4% wider than the previous
+HIST_BUCKETS = 480  # Covers up to ~1.5 Tbps
+CONVERGENCE_TOLERANCE = 0.05  # Stop once the 95% CI is within +/-5% of the mean
+CONVERGENCE_SAMPLES = 10  # Interval rates the CI is computed over
+MIN_TEST_SECONDS = 3.0
+MAX_TEST_SECONDS = 30.0
+# Two-sided 95% Student t critical values by degrees of freedom
+T_95 = {1: 12.706, 2: 4.303, 3: 3.182, 4: 2.776, 5: 2.571, 6: 2.447, 7: 2.365, 8: 2.306,
+        9: 2.262, 10: 2.228, 12: 2.179, 15: 2.131, 20: 2.086, 30: 2.042}
+
+
+class ThroughputEstimator:
+    # Throughput from a stream of (timestamp, bytes) samples.
+    #
+    # Samples go into a fixed-size, array-backed ring buffer of cumulative byte
+    # counts, one slot per RESOLUTION seconds. Each configured window keeps a
+    # tail pointer into the ring that only ever moves forward, so add() is O(1)
+    # amortised no matter how many chunks arrive. Every closed slot's rate feeds
+    # the EWMA and a log-spaced histogram used for the percentiles.
+    def __init__(self, windows=WINDOWS, resolution=RESOLUTION, ewma_tau=EWMA_TAU):
+        self.windows = tuple(windows)
+        self.resolution = resolution
+        self.ewma_tau = ewma_tau
+        self.capacity = int(max(self.windows) / resolution) * 2 + 4
+        self.times = array('d', bytes(8 * self.capacity))
+        self.totals = array('d', bytes(8 * self.capacity))
+        self.histogram = array('q', bytes(8 * HIST_BUCKETS))
+        self._log_growth = math.log(HIST_GROWTH)
+        self.reset()
+
+    def reset(self, now=None):
+        self.start_time = None
+        self.total_bytes = 0
+        self.head = 0  # Sequence number of the open slot
+        self.tails = [0] * len(self.windows)
+        self.slot_start = 0.0
+        self.last_rate = 0.0
+        self.ewma = None
+        self.samples = 0
+        for i in range(HIST_BUCKETS):
+            self.histogram[i] = 0
+        if now is not None:
+            self.start(now)
+
+    def start(self, now=None):
+        now = time.perf_counter() if now is None else now
+        self.start_time = now
+        self.slot_start = now
+        self.times[0] = now
+        self.totals[0] = 0
+        self.head = 0
+
+    def add(self, nbytes, now=None):
+        now = time.perf_counter() if now is None else now
+        if self.start_time is None:
+            self.start(now)
+        self.total_bytes += nbytes
+        if now - self.slot_start >= self.resolution:
+            self._close_slot(now)
+        slot = self.head % self.capacity
+        self.times[slot] = now
+        self.totals[slot] = self.total_bytes
+        self._advance_tails(now)
+
+    def _close_slot(self, now):
+        cap = self.capacity
+        prev = (self.head - 1) % cap
+        cur = self.head % cap
+        if self.head > 0:
+            dt = self.times[cur] - self.times[prev]
+            if dt > 0:
+                self._record((self.totals[cur] - self.totals[prev]) * 8 / dt, dt)
+        # Slots with no traffic at all count as zero-rate samples
+        idle = int((now - self.slot_start) / self.resolution) - 1
+        if idle > 0:
+            self.histogram[0] += idle
+            self.samples += idle
+        self.head += 1
+        self.slot_start = now
+        slot = self.head % cap
+        self.times[slot] = self.times[cur]
+        self.totals[slot] = self.totals[cur]
+
+    def _record(self, bps, dt):
+        self.last_rate = bps
+        if self.ewma is None:
+            self.ewma = bps
+        else:
+            alpha = 1 - math.exp(-dt / self.ewma_tau)
+            self.ewma += alpha * (bps - self.ewma)
+        self.histogram[self._bucket(bps)] += 1
+        self.samples += 1
+
+    def _bucket(self, bps):
+        if bps < HIST_MIN_BPS:
+            return 0
+        return min(HIST_BUCKETS - 1, 1 + int(math.log(bps / HIST_MIN_BPS) / self._log_growth))
+
+    def _advance_tails(self, now):
+        cap = self.capacity
+        oldest = max(0, self.head - cap + 1)
+        for i, window in enumerate(self.windows):
+            tail = max(self.tails[i], oldest)
+            cutoff = now - window
+            while tail < self.head and self.times[(tail + 1) % cap] <= cutoff:
+                tail += 1
+            self.tails[i] = tail
+
+    def rate(self, window, now=None):
+        # Mean bits/s over the last `window` seconds (must be one of self.windows)
+        if self.start_time is None:
+            return 0.0
+        now = time.perf_counter() if now is None else now
+        self._advance_tails(now)
+        cap = self.capacity
+        tail = self.tails[self.windows.index(window)]
+        start = self.times[tail % cap]
+        # After an idle gap the tail is the last slot before it; the next slot's
+        # traffic began no earlier than one slot before its last sample. If that
+        # is inside the window, the gap counts as zero rate instead of stretching
+        # the window back to the tail.
+        if tail < self.head and self.times[(tail + 1) % cap] - self.resolution > now - window:
+            start = max(start, now - window)
+        elapsed = now - start
+        if elapsed <= 0:
+            return 0.0
+        return (self.total_bytes - self.totals[tail % cap]) * 8 / elapsed
+
+    def instantaneous(self, now=None):
+        # Rate of the last completed slot, or 0 once the transfer has stalled
+        now = time.perf_counter() if now is None else now
+        if self.start_time is None or now - self.slot_start > 2 * self.resolution:
+            return 0.0
+        return self.last_rate
+
+    def mean(self, now=None):
+        if self.start_time is None:
+            return 0.0
+        elapsed = (time.perf_counter() if now is None else now) - self.start_time
+        return self.total_bytes * 8 / elapsed if elapsed > 0 else 0.0
+
+    def percentile(self, p):
+        # Approximate p-th percentile (0-100) of the per-slot rates seen so far
+        if not self.samples:
+            return 0.0
+        target = self.samples * p / 100
+        seen = 0
+        for i in range(HIST_BUCKETS):
+            seen += self.histogram[i]
+            if seen >= target and self.histogram[i]:
+                if i == 0:
+                    return 0.0
+                # Geometric midpoint of the bucket
+                return HIST_MIN_BPS * HIST_GROWTH ** (i - 0.5)
+        return HIST_MIN_BPS * HIST_GROWTH ** (HIST_BUCKETS - 1)
+
+    def snapshot(self, now=None):
+        now = time.perf_counter() if now is None else now
+        result = {
+            "instant": self.instantaneous(now),
+            "ewma": self.ewma or 0.0,
+            "mean": self.mean(now),
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+            "total_bytes": self.total_bytes,
+            "elapsed": now - self.start_time if self.start_time is not None else 0.0,
+        }
+        for window in self.windows:
+            result[f"window_{window:g}s"] = self.rate(window, now)
+        return result
+
+
+def t_critical(df):
+    for limit in sorted(T_95):
+        if df <= limit:
+            return T_95[limit]
+    return 1.96
+
+
+class ConvergenceDetector:
+    # Decides when a test can end early. Fed the running byte total at every
+    # progress tick, it turns consecutive ticks into interval rates and ends the
+    # test once the 95% confidence interval of their mean, over the last
+    # `samples` intervals, is within `tolerance` of it - but never before
+    # min_duration, and always by max_duration or max_bytes.
+    def __init__(self, tolerance=CONVERGENCE_TOLERANCE, samples=CONVERGENCE_SAMPLES,
+                 min_duration=MIN_TEST_SECONDS, max_duration=MAX_TEST_SECONDS, max_bytes=None):
+        self.tolerance = tolerance
+        self.min_duration = min_duration
+        self.max_duration = max_duration
+        self.max_bytes = max_bytes
+        self.rates = deque(maxlen=samples)
+        self.last = None
+        self.reason = None
+        self.mean = 0.0
+        self.half_width = math.inf
+
+    @property
+    def relative_half_width(self):
+        return self.half_width / self.mean if self.mean > 0 else math.inf
+
+    def update(self, elapsed, total_bytes):
+        # Returns True once the test should stop; self.reason says why
+        if self.last is not None and elapsed > self.last[0]:
+            self.rates.append((total_bytes - self.last[1]) * 8 / (elapsed - self.last[0]))
+        self.last = (elapsed, total_bytes)
+        n = len(self.rates)
+        if n >= 2:
+            self.mean = sum(self.rates) / n
+            variance = sum((r - self.mean) ** 2 for r in self.rates) / (n - 1)
+            self.half_width = t_critical(n - 1) * math.sqrt(variance / n)
+        if self.max_bytes is not None and total_bytes >= self.max_bytes:
+            self.reason = "max_bytes"
+        elif self.max_duration is not None and elapsed >= self.max_duration:
+            self.reason = "max_duration"
+        elif (elapsed >= self.min_duration and n == self.rates.maxlen
+              and self.relative_half_width <= self.tolerance):
+            self.reason = "converged"
+        return self.reason is not None
+
+    def report(self, elapsed, total_bytes, fixed_bytes, rate_bps):
+        # What stopping here saved compared with transferring all of fixed_bytes.
+        # Only a converged test stopped early; a capped or stopped one saved nothing.
+        bytes_saved, seconds_saved = 0, 0.0
+        if self.reason == "converged":
+            bytes_saved = max(0, fixed_bytes - total_bytes)
+            seconds_saved = max(0.0, fixed_bytes * 8 / rate_bps - elapsed) if rate_bps > 0 else None
+        return {
+            "reason": self.reason or "stopped",
+            "tolerance": self.tolerance,
+            "ci_pct": self.relative_half_width * 100 if self.mean > 0 else None,
+            "bytes_saved": bytes_saved,
+            "seconds_saved": seconds_saved,
+        }
@@ -0,0 +1,2 @@
+# Tkinter and PyQt6 front ends. The toolkit-neutral parts (ui_pipeline,
+# readouts) import neither toolkit.
@@ -0,0 +1,219 @@
+import math
+from array import array
+from PyQt6.QtWidgets import QWidget
+from PyQt6.QtCore import Qt, QRect, QLine
+from PyQt6.QtGui import QPainter, QPixmap, QColor, QPen
+
+# Rolling throughput/latency graph for the PyQt window.
+#
+# Samples land in fixed-size ring buffers, one per zoom level, holding the
+# min/max of 1, 4, 16 or 64 consecutive samples. Memory is allocated up front
+# and never grows. The widget keeps a pixmap of what is on screen: a new
+# sample scrolls it one column and paints only that column. A full redraw
+# (zoom, resize, rescale) paints one column per pixel, so its cost depends on
+# the widget width, never on how long the monitor has been running.
+
+GRAPH_INTERVAL = 0.5  # Seconds per sample (one column at the closest zoom)
+HISTORY_SECONDS = 6 * 3600  # Kept at the widest zoom
+ZOOM_FACTORS = (1, 4, 16, 64)  # Samples per column at each zoom level
+BACKGROUND = QColor(24, 24, 24)
+GRID = QColor(60, 60, 60)
+TEXT = QColor(170, 170, 170)
+GRID_LINES = (0.25, 0.5, 0.75)  # Dotted horizontal guides, as fractions of the height
+
+
+def nice_ceiling(value):
+    # Round up to 1, 2 or 5 times a power of ten, for a stable axis
+    if value <= 0 or math.isnan(value):
+        return 1.0
+    power = 10 ** math.floor(math.log10(value))
+    for step in (1, 2, 5, 10):
+        if value <= step * power:
+            return step * power
+    return 10 * power
+
+
+class DecimatedRing:
+    # Min/max of a sample stream at several decimation factors, each in its own
+    # fixed-size ring. push() is O(number of levels).
+    def __init__(self, samples=int(HISTORY_SECONDS / GRAPH_INTERVAL), factors=ZOOM_FACTORS):
+        self.factors = factors
+        self.capacity = [max(1, samples // f) for f in factors]
+        self.mins = [array('d', [math.nan]) * c for c in self.capacity]
+        self.maxs = [array('d', [math.nan]) * c for c in self.capacity]
+        self.heads = [0] * len(factors)  # Columns written so far per level
+        self.partial = [(math.inf, -math.inf, 0)] * len(factors)
+
+    def push(self, value):
+        # Returns the levels that completed a new column
+        completed = []
+        for level, factor in enumerate(self.factors):
+            lo, hi, n = self.partial[level]
+            if not math.isnan(value):
+                lo, hi = min(lo, value), max(hi, value)
+            n += 1
+            if n < factor:
+                self.partial[level] = (lo, hi, n)
+                continue
+            i = self.heads[level] % self.capacity[level]
+            self.mins[level][i] = lo if lo != math.inf else math.nan
+            self.maxs[level][i] = hi if hi != -math.inf else math.nan
+            self.heads[level] += 1
+            self.partial[level] = (math.inf, -math.inf, 0)
+            completed.append(level)
+        return completed
+
+    def column(self, level, age=0):
+        # (min, max) of the column `age` steps back from the newest; NaN if empty
+        if age >= min(self.heads[level], self.capacity[level]):
+            return math.nan, math.nan
+        i = (self.heads[level] - 1 - age) % self.capacity[level]
+        return self.mins[level][i], self.maxs[level][i]
+
+    def peak(self, level, count):
+        # Highest max over the newest `count` columns
+        peak = 0.0
+        for age in range(min(count, self.heads[level], self.capacity[level])):
+            hi = self.maxs[level][(self.heads[level] - 1 - age) % self.capacity[level]]
+            if hi > peak:
+                peak = hi
+        return peak
+
+    def clear(self):
+        for level, capacity in enumerate(self.capacity):
+            self.mins[level] = array('d', [math.nan]) * capacity
+            self.maxs[level] = array('d', [math.nan]) * capacity
+        self.heads = [0] * len(self.factors)
+        self.partial = [(math.inf, -math.inf, 0)] * len(self.factors)
+
+
+class LiveGraph(QWidget):
+    # series: (key, colour, axis) with axis "rate" (left, Mbps) or "latency" (right, ms)
+    SERIES = (("download", QColor("#1e90ff"), "rate"), ("upload", QColor("orange"), "rate"),
+              ("latency", QColor(160, 160, 160), "latency"))
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.rings = {key: DecimatedRing() for key, _, _ in self.SERIES}
+        self.level = 0
+        self.scales = {"rate": 1.0, "latency": 1.0}
+        self.pixmap = None
+        self.scrolled = 0  # Columns scrolled in since the last full redraw
+        self.setMinimumHeight(80)
+        self.setToolTip("Scroll to zoom out to the last few hours")
+
+    def push(self, values):
+        # values: {key: number or NaN}; missing keys are recorded as gaps
+        completed = set()
+        for key, ring in self.rings.items():
+            completed.update(ring.push(values.get(key, math.nan)))
+        if self.level not in completed or self.pixmap is None:
+            return
+        self.scrolled += 1
+        if self.scrolled >= self.pixmap.width() or any(self._needs_rescale(axis) for axis in self.scales):
+            # Rescale when a value goes off the top, and once per screenful so the axes can shrink
+            self.redraw()
+        else:
+            # Scroll the existing picture left by one column and paint only the new one
+            width = self.pixmap.width()
+            self.pixmap.scroll(-1, 0, self.pixmap.rect())
+            painter = QPainter(self.pixmap)
+            self._paint_column(painter, width - 1, 0)
+            painter.end()
+        self.update()
+
+    def _needs_rescale(self, axis):
+        # NaN compares false, so gaps never trigger a rescale
+        return any(self.rings[key].column(self.level)[1] > self.scales[axis]
+                   for key, _, a in self.SERIES if a == axis)
+
+    def redraw(self):
+        # Full repaint of the visible columns; also lets the axes shrink again
+        if self.width() <= 0 or self.height() <= 0:
+            return
+        width = self.width()
+        self.scrolled = 0
+        for axis in self.scales:
+            peak = max(self.rings[key].peak(self.level, width) for key, _, a in self.SERIES if a == axis)
+            self.scales[axis] = nice_ceiling(peak)
+        height = self.height()
+        self.pixmap = QPixmap(width, height)
+        self.pixmap.fill(BACKGROUND)
+        painter = QPainter(self.pixmap)
+        painter.setPen(GRID)
+        first = 0 if self._on_grid(width - 1) else 1
+        for fraction in GRID_LINES:
+            y = int(height * fraction)
+            for x in range(first, width, 2):
+                painter.drawPoint(x, y)
+        # One batched drawLines() call per series rather than one call per column
+        for key, colour, axis in self.SERIES:
+            ring, scale = self.rings[key], self.scales[axis]
+            lines = []
+            for x in range(width):
+                lo, hi = ring.column(self.level, width - 1 - x)
+                if not math.isnan(hi):
+                    lines.append(QLine(x, self._y(lo, scale, height), x, self._y(hi, scale, height)))
+            painter.setPen(QPen(colour))
+            painter.drawLines(lines)
+        painter.end()
+        self.update()
+
+    def _paint_column(self, painter, x, age):
+        height = self.pixmap.height()
+        painter.setPen(BACKGROUND)
+        painter.drawLine(x, 0, x, height - 1)
+        if self._on_grid(age):
+            painter.setPen(GRID)
+            for fraction in GRID_LINES:
+                painter.drawPoint(x, int(height * fraction))
+        for key, colour, axis in self.SERIES:
+            lo, hi = self.rings[key].column(self.level, age)
+            if math.isnan(hi):
+                continue
+            scale = self.scales[axis]
+            painter.setPen(QPen(colour))
+            painter.drawLine(x, self._y(lo, scale, height), x, self._y(hi, scale, height))
+
+    def _on_grid(self, age):
+        # Guides are dotted on every other column counted since the start, not by
+        # pixel, so the dots scroll with the data whatever the widget width
+        return (self.rings[self.SERIES[0][0]].heads[self.level] - age) % 2 == 0
+
+    @staticmethod
+    def _y(value, scale, height):
+        return height - 1 - int(min(value / scale, 1.0) * (height - 1))
+
+    def span_label(self):
+        seconds = self.width() * GRAPH_INTERVAL * ZOOM_FACTORS[self.level]
+        return f"{seconds / 60:.0f} min" if seconds < 3600 else f"{seconds / 3600:.1f} h"
+
+    def clear(self):
+        for ring in self.rings.values():
+            ring.clear()
+        self.redraw()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        if self.pixmap is not None:
+            painter.drawPixmap(0, 0, self.pixmap)
+        painter.setPen(TEXT)
+        font = painter.font()
+        font.setPointSize(8)
+        painter.setFont(font)
+        box = QRect(4, 2, self.width() - 8, 14)
+        painter.drawText(box, Qt.AlignmentFlag.AlignLeft, f"{self.scales['rate']:g} Mbps")
+        painter.drawText(box, Qt.AlignmentFlag.AlignHCenter, self.span_label())
+        painter.drawText(box, Qt.AlignmentFlag.AlignRight, f"{self.scales['latency']:g} ms")
+        painter.end()
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.redraw()
+
+    def wheelEvent(self, event):
+        step = -1 if event.angleDelta().y() > 0 else 1
+        level = max(0, min(len(ZOOM_FACTORS) - 1, self.level + step))
+        if level != self.level:
+            self.level = level
+            self.redraw()
@@ -0,0 +1,446 @@
+import sys
+from PyQt6.QtWidgets import (
+    QApplication, QWidget, QLabel, QPushButton, QVBoxLayout, QHBoxLayout, QFrame
+)
+from PyQt6.QtCore import Qt, QTimer, QThread, QPropertyAnimation, QEasingCurve
+from PyQt6.QtWidgets import QGraphicsDropShadowEffect
+from PyQt6.QtGui import QColor, QShortcut, QKeySequence
+from ..transfer import TEST_URL, DOWNLOAD_STREAMS, UPLOAD_URL, UPLOAD_TOTAL, UPLOAD_CHUNK_SIZE
+from ..speed_engine import DownloadTest, UploadTest
+from ..history_store import HistoryWriter, DEFAULT_PATH as HISTORY_PATH
+from ..latency import LatencyProber, IDLE_PROBE_SECONDS
+from ..self_profile import ClientProfiler
+from ..launcher import metrics_port, start_exporter, startup_check
+from .ui_pipeline import MetricsQueue, TestRunner, FRAME_INTERVAL
+from .readouts import rate_text, total_text, streams_text, interfaces_text, current_latency, latency_text, profile_text
+from .live_graph import LiveGraph, GRAPH_INTERVAL
+
+def report_result(name, result):
+    if name == "upload":
+        print(f"[UploadWorker] Upload finished or stopped: {result['bytes']} bytes at {result['mbps']:.2f} Mbps")
+        report = result.get("server")
+        if report:
+            print(f"[UploadWorker] Server received {report['bytes']} bytes at {report['mbps']:.2f} Mbps")
+    if result.get("profile"):
+        print(f"[{name.capitalize()}Worker] {profile_text(result['profile'])}")
+
+class TestThread(QThread):
+    # Runs a ui_pipeline.TestRunner, which pushes everything into the window's MetricsQueue;
+    # never touches the UI
+    def __init__(self, name, test, metrics):
+        super().__init__()
+        self.runner = TestRunner(name, test, metrics)
+    def run(self):
+        result = self.runner.run()
+        if result is not None:
+            report_result(self.runner.name, result)
+    def set_profiling(self, enabled):
+        self.runner.set_profiling(enabled)
+    def stop(self):
+        self.runner.stop()
+
+class RealTimeSpeedMonitorPyQt(QWidget):
+    def __init__(self, exporter=None, profile=False):
+        super().__init__()
+        self.setWindowTitle("Live Speed Monitor (Streaming 200 MB)")
+        self.setGeometry(200, 200, 600, 390)
+        self.setMinimumSize(600, 390)
+        self.setMaximumSize(600, 390)
+        self.download_worker = None
+        self.upload_worker = None
+        self.passive_worker = None
+        self.active_workers = 0
+        self._is_fading_out = False
+        self._fade_anim = None
+        self.history = None
+        self.prober = None
+        self.exporter = exporter  # MetricsExporter serving --metrics-port, or None
+        self.start_timer = None
+        self.metrics = MetricsQueue()
+        self.graph_values = {}  # Newest download/upload Mbps and latency ms, sampled by graph_timer
+        self.profiling = profile  # Client self-profiling, toggled with Ctrl+P
+        self.client_bound = {}  # direction -> latest client-bound warning
+
+        # Main layout
+        main_layout = QVBoxLayout()
+        main_layout.setContentsMargins(10, 8, 10, 2)  # Even tighter bottom margin
+        main_layout.setSpacing(6)  # Reduce vertical spacing between sections
+
+        # Side-by-side layout for download/upload
+        h_layout = QHBoxLayout()
+        h_layout.setSpacing(10)  # Reduce space between download/upload sections
+        # Download section
+        download_frame = QFrame()
+        download_vbox = QVBoxLayout()
+        download_icon = QLabel("⬇️", alignment=Qt.AlignmentFlag.AlignCenter)
+        download_icon.setStyleSheet("font-size: 28px; margin-bottom: 2px;")
+        download_vbox.addWidget(download_icon)
+        self.download_icon = download_icon  # Save for animation
+        self.download_icon_glow = QGraphicsDropShadowEffect()
+        self.download_icon_glow.setColor(QColor('#1e90ff'))
+        self.download_icon_glow.setBlurRadius(0)
+        self.download_icon_glow.setOffset(0, 0)
+        self.download_icon.setGraphicsEffect(self.download_icon_glow)
+        self.download_label = QLabel("Download: -- Mbps | -- MBps", alignment=Qt.AlignmentFlag.AlignCenter)
+        self.download_label.setStyleSheet("font-size: 15px;")
+        download_vbox.addWidget(self.download_label)
+        self.total_downloaded_label = QLabel("Downloaded: 0.00 MB", alignment=Qt.AlignmentFlag.AlignCenter)
+        self.total_downloaded_label.setStyleSheet("font-size: 15px;")
+        download_vbox.addWidget(self.total_downloaded_label)
+        self.download_streams_label = QLabel("Streams: --", alignment=Qt.AlignmentFlag.AlignCenter)
+        self.download_streams_label.setStyleSheet("font-size: 11px; color: gray;")
+        download_vbox.addWidget(self.download_streams_label)
+        download_frame.setLayout(download_vbox)
+        download_frame.setStyleSheet("""
+            QFrame {
+                border: 2px solid #1e90ff;
+                border-radius: 18px;
+                background: rgba(30, 144, 255, 0.07);
+            }
+        """)
+        h_layout.addWidget(download_frame)
+        # Upload section
+        upload_frame = QFrame()
+        upload_vbox = QVBoxLayout()
+        upload_icon = QLabel("⬆️", alignment=Qt.AlignmentFlag.AlignCenter)
+        upload_icon.setStyleSheet("font-size: 28px; margin-bottom: 2px;")
+        upload_vbox.addWidget(upload_icon)
+        self.upload_icon = upload_icon  # Save for animation
+        self.upload_icon_glow = QGraphicsDropShadowEffect()
+        self.upload_icon_glow.setColor(QColor('orange'))
+        self.upload_icon_glow.setBlurRadius(0)
+        self.upload_icon_glow.setOffset(0, 0)
+        self.upload_icon.setGraphicsEffect(self.upload_icon_glow)
+        self.upload_label = QLabel("Upload: -- Mbps | -- MBps", alignment=Qt.AlignmentFlag.AlignCenter)
+        self.upload_label.setStyleSheet("font-size: 15px;")
+        upload_vbox.addWidget(self.upload_label)
+        self.total_uploaded_label = QLabel("Uploaded: 0.00 MB", alignment=Qt.AlignmentFlag.AlignCenter)
+        self.total_uploaded_label.setStyleSheet("font-size: 15px;")
+        upload_vbox.addWidget(self.total_uploaded_label)
+        upload_frame.setLayout(upload_vbox)
+        upload_frame.setStyleSheet("""
+            QFrame {
+                border: 2px solid orange;
+                border-radius: 18px;
+                background: rgba(255, 165, 0, 0.07);
+            }
+        """)
+        h_layout.addWidget(upload_frame)
+        main_layout.addLayout(h_layout)
+
+        # Rolling graph of download/upload rate and latency
+        self.graph = LiveGraph()
+        self.graph.setFixedHeight(110)
+        main_layout.addWidget(self.graph)
+
+        # Latency
+        self.latency_label = QLabel("Latency: --", alignment=Qt.AlignmentFlag.AlignCenter)
+        self.latency_label.setStyleSheet("font-size: 12px;")
+        main_layout.addWidget(self.latency_label)
+
+        # Status
+        self.status_label = QLabel("Status: Idle", alignment=Qt.AlignmentFlag.AlignCenter)
+        self.status_label.setStyleSheet("color: white;")
+        main_layout.addWidget(self.status_label)
+
+        # Buttons
+        btn_layout = QHBoxLayout()
+        self.start_btn = QPushButton("Start")
+        self.start_btn.setStyleSheet("background: green; color: white; font-weight: bold; font-size: 16px;")
+        self.start_btn.setFixedHeight(40)
+        self.start_btn.clicked.connect(self.start_monitor)
+        btn_layout.addWidget(self.start_btn)
+        self.stop_btn = QPushButton("Stop")
+        self.stop_btn.setStyleSheet("background: #ff8000; color: white; font-weight: bold; font-size: 16px;")
+        self.stop_btn.setFixedHeight(40)
+        self.stop_btn.clicked.connect(self.stop_monitor)
+        btn_layout.addWidget(self.stop_btn)
+        self.passive_btn = QPushButton("Passive")
+        self.passive_btn.setStyleSheet("background: #1e90ff; color: white; font-weight: bold; font-size: 16px;")
+        self.passive_btn.setFixedHeight(40)
+        self.passive_btn.clicked.connect(self.start_passive)
+        btn_layout.addWidget(self.passive_btn)
+        main_layout.addLayout(btn_layout)
+
+        self.setLayout(main_layout)
+
+        # Animation objects
+        self.download_anim = None
+        self.upload_anim = None
+        self.download_glow_anim = None
+        self.upload_glow_anim = None
+
+        # Workers only push into self.metrics; the UI drains it at a fixed frame rate
+        self.frame_timer = QTimer(self)
+        self.frame_timer.timeout.connect(self.drain_metrics)
+        self.frame_timer.start(int(FRAME_INTERVAL * 1000))
+        QShortcut(QKeySequence("Ctrl+P"), self).activated.connect(self.toggle_profiling)
+
+        # The graph advances at a fixed rate; idle time shows as a gap
+        self.graph_timer = QTimer(self)
+        self.graph_timer.timeout.connect(self.sample_graph)
+        self.graph_timer.start(int(GRAPH_INTERVAL * 1000))
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.setWindowOpacity(0.0)
+        self._fade_anim = QPropertyAnimation(self, b"windowOpacity")
+        self._fade_anim.setDuration(250)
+        self._fade_anim.setStartValue(0.0)
+        self._fade_anim.setEndValue(1.0)
+        self._fade_anim.setEasingCurve(QEasingCurve.Type.InOutQuad)
+        self._fade_anim.start()
+
+    def closeEvent(self, event):
+        if self._is_fading_out:
+            event.accept()
+            return
+        event.ignore()
+        self._is_fading_out = True
+        self._fade_anim = QPropertyAnimation(self, b"windowOpacity")
+        self._fade_anim.setDuration(250)
+        self._fade_anim.setStartValue(self.windowOpacity())
+        self._fade_anim.setEndValue(0.0)
+        self._fade_anim.setEasingCurve(QEasingCurve.Type.InOutQuad)
+        self._fade_anim.finished.connect(self._final_close)
+        self._fade_anim.start()
+
+    def _final_close(self):
+        self._is_fading_out = False
+        if self.history is not None:
+            self.history.close()
+            self.history = None
+        super().close()
+        app = QApplication.instance()
+        if app is not None:
+            QTimer.singleShot(0, app.quit)
+
+    def start_passive(self):
+        self.start_btn.setEnabled(False)
+        self.passive_btn.setEnabled(False)
+        self.latency_label.setText("Latency: --")
+        self.status_label.setText("Status: Passive (no test traffic)")
+        self.status_label.setStyleSheet("color: green;")
+        self.active_workers = 1
+        from ..passive_monitor import PassiveMonitor
+        self.passive_worker = TestThread("passive", PassiveMonitor(), self.metrics)
+        self.passive_worker.start()
+
+    def start_monitor(self):
+        self.start_btn.setEnabled(False)
+        self.passive_btn.setEnabled(False)
+        self.download_label.setText(rate_text("Download"))
+        self.total_downloaded_label.setText(total_text("Downloaded"))
+        self.download_streams_label.setText(streams_text())
+        self.upload_label.setText(rate_text("Upload"))
+        self.total_uploaded_label.setText(total_text("Uploaded"))
+        self.latency_label.setText("Latency: measuring idle...")
+        self.status_label.setText("Status: Running...")
+        self.status_label.setStyleSheet("color: green;")
+        # Start pulsing glow animations
+        self.start_glow_animation(self.download_icon_glow, 'download')
+        self.start_glow_animation(self.upload_icon_glow, 'upload')
+        if self.history is None:
+            try:
+                self.history = HistoryWriter(HISTORY_PATH)
+            except (OSError, ValueError) as e:
+                print(f"[History] Not recording: {e}")
+        # Sample idle latency for a moment before any load starts
+        self.prober = LatencyProber(TEST_URL, exporter=self.exporter)
+        self.prober.start()
+        self.start_timer = QTimer(self)
+        self.start_timer.setSingleShot(True)
+        self.start_timer.timeout.connect(self.start_workers)
+        self.start_timer.start(int(IDLE_PROBE_SECONDS * 1000))
+
+    def start_workers(self):
+        self.start_timer = None
+        self.active_workers = 2
+        common = {"history": self.history, "prober": self.prober, "exporter": self.exporter}
+        # Download worker; each test gets its own profiler, switched with set_profiling() while running
+        self.download_worker = TestThread("download", DownloadTest(
+            TEST_URL, streams=DOWNLOAD_STREAMS, profiler=ClientProfiler(self.profiling), **common), self.metrics)
+        self.download_worker.start()
+        # Upload worker
+        self.upload_worker = TestThread("upload", UploadTest(
+            UPLOAD_URL, UPLOAD_TOTAL, UPLOAD_CHUNK_SIZE, profiler=ClientProfiler(self.profiling), **common),
+            self.metrics)
+        self.upload_worker.start()
+
+    def stop_monitor(self):
+        if self.start_timer is not None:
+            # Stopped while still measuring idle latency: nothing else was started
+            self.start_timer.stop()
+            self.start_timer = None
+            self.active_workers = 1
+            self.worker_finished()
+            return
+        if self.download_worker:
+            self.download_worker.stop()
+            self.download_worker.wait()
+        if self.upload_worker:
+            self.upload_worker.stop()
+            self.upload_worker.wait()
+        if self.passive_worker:
+            self.passive_worker.stop()
+            self.passive_worker.wait()
+        self.status_label.setText("Status: Stopping...")
+        self.status_label.setStyleSheet("color: orange;")
+
+    def sample_graph(self):
+        self.graph.push(self.graph_values)
+
+    def drain_metrics(self):
+        latest, events = self.metrics.drain()
+        if "download" in latest:
+            update = latest["download"]
+            mbps = update["mbps"]
+            self.graph_values["download"] = mbps
+            self.update_labels_download(mbps, update["bytes"], update["per_stream_mbps"])
+        if "upload" in latest:
+            update = latest["upload"]
+            mbps = update["mbps"]
+            self.graph_values["upload"] = mbps
+            self.update_labels_upload(mbps, update["bytes"])
+        if "latency" in latest:
+            self.update_latency(latest["latency"])
+        for direction in ("download", "upload"):
+            if f"{direction}.profile" in latest:
+                self.update_profile(direction, latest[f"{direction}.profile"])
+        if "passive" in latest:
+            update = latest["passive"]
+            self.graph_values["download"] = update["rx_mbps"]
+            self.graph_values["upload"] = update["tx_mbps"]
+            self.update_labels_passive(update)
+        for event, value in events:
+            if event == "download.done":
+                self.graph_values.pop("download", None)
+                self.update_labels_download(None, value["bytes"])
+            elif event == "upload.done":
+                self.graph_values.pop("upload", None)
+                self.update_labels_upload(None, value["bytes"])
+            elif event == "download.error":
+                self.worker_error_download(value)
+            elif event == "upload.error":
+                self.worker_error_upload(value)
+            elif event == "passive.error":
+                self.status_label.setText(f"Passive Error: {value}")
+                self.status_label.setStyleSheet("color: red;")
+            elif event.endswith(".finished"):
+                self.worker_finished()
+
+    def update_labels_download(self, mbps, downloaded, per_stream=None):
+        # mbps None: the test has finished, so clear the rate and keep the total
+        self.download_label.setText(rate_text("Download", mbps))
+        if mbps is None or per_stream:
+            self.download_streams_label.setText(streams_text(per_stream))
+        self.total_downloaded_label.setText(total_text("Downloaded", downloaded))
+
+    def update_labels_upload(self, mbps, uploaded):
+        if mbps is not None:
+            # After the test, keep the last speed visible and only update the total
+            self.upload_label.setText(rate_text("Upload", mbps))
+        self.total_uploaded_label.setText(total_text("Uploaded", uploaded))
+
+    def update_labels_passive(self, update):
+        # Receive goes in the download panel and transmit in the upload panel
+        self.download_label.setText(rate_text("RX", update["rx_mbps"]))
+        self.total_downloaded_label.setText(total_text("Received", update["rx_bytes"]))
+        self.upload_label.setText(rate_text("TX", update["tx_mbps"]))
+        self.total_uploaded_label.setText(total_text("Sent", update["tx_bytes"]))
+        self.download_streams_label.setText(interfaces_text(update))
+
+    def worker_finished(self):
+        self.active_workers -= 1
+        if self.active_workers <= 0:
+            self.graph_values.clear()
+            self.client_bound.clear()
+            self.status_label.setText("Status: Stopped")
+            self.status_label.setStyleSheet("color: orange;")
+            problem = self.history.problem() if self.history is not None else None
+            if problem is not None:
+                print(f"[History] {problem}")
+                self.status_label.setText(f"Status: Stopped ({problem})")
+            self.start_btn.setEnabled(True)
+            self.passive_btn.setEnabled(True)
+            self.download_worker = None
+            self.upload_worker = None
+            self.passive_worker = None
+            # Stop pulsing glow animations
+            self.stop_glow_animation(self.download_icon_glow, 'download')
+            self.stop_glow_animation(self.upload_icon_glow, 'upload')
+            if self.prober is not None:
+                self.prober.stop(wait=False)  # Joining could hold up the UI for a probe timeout
+                self.prober = None
+
+    def toggle_profiling(self):
+        self.profiling = not self.profiling
+        for worker in (self.download_worker, self.upload_worker):
+            if worker is not None:
+                worker.set_profiling(self.profiling)
+        if not self.profiling:
+            self.client_bound.clear()
+        print(f"[Profile] Client self-profiling {'on' if self.profiling else 'off'}")
+
+    def update_profile(self, direction, profile):
+        if profile.get("client_bound"):
+            self.client_bound[direction] = profile["warning"]
+        else:
+            self.client_bound.pop(direction, None)
+        if self.client_bound and self.active_workers > 0:
+            # The network may be faster than shown: this machine is the limit
+            self.status_label.setText(f"Status: {next(iter(self.client_bound.values()))}")
+            self.status_label.setStyleSheet("color: orange;")
+
+    def update_latency(self, summary):
+        current = current_latency(summary)
+        if current and current.get("rtt_ms") is not None:
+            self.graph_values["latency"] = current["rtt_ms"]
+        self.latency_label.setText(latency_text(summary))
+
+    def worker_error_download(self, msg):
+        self.download_label.setText("Error")
+        self.status_label.setText(f"Download Error: {msg}")
+        self.status_label.setStyleSheet("color: red;")
+
+    def worker_error_upload(self, msg):
+        self.upload_label.setText("Error")
+        self.status_label.setText(f"Upload Error: {msg}")
+        self.status_label.setStyleSheet("color: red;")
+
+    def start_glow_animation(self, effect, which):
+        anim = QPropertyAnimation(effect, b"blurRadius")
+        anim.setStartValue(0)
+        anim.setKeyValueAt(0.5, 32)
+        anim.setEndValue(0)
+        anim.setDuration(900)
+        anim.setLoopCount(-1)
+        anim.setEasingCurve(QEasingCurve.Type.InOutQuad)
+        anim.start()
+        if which == 'download':
+            self.download_glow_anim = anim
+        else:
+            self.upload_glow_anim = anim
+
+    def stop_glow_animation(self, effect, which):
+        if which == 'download' and self.download_glow_anim:
+            self.download_glow_anim.stop()
+            self.download_glow_anim = None
+        elif which == 'upload' and self.upload_glow_anim:
+            self.upload_glow_anim.stop()
+            self.upload_glow_anim = None
+        effect.setBlurRadius(0)
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    port = metrics_port(argv)
+    exporter = start_exporter(port) if port is not None else None
+    app = QApplication(sys.argv[:1] + list(argv))
+    win = RealTimeSpeedMonitorPyQt(exporter, profile='--profile' in argv)
+    win.show()
+    if startup_check():
+        QTimer.singleShot(0, app.quit)  # Startup benchmark: quit once the window is up
+    return app.exec()
+
+if __name__ == "__main__":
+    sys.exit(main())
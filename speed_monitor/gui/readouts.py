@@ -0,0 +1,51 @@
+# Text shown by both front ends, built from engine progress updates and
+# results. No toolkit imports: the Tk and Qt windows only decide where each
+# string goes.
+
+MB = 1024 * 1024
+
+
+def rate_text(label, mbps=None, per_byte=True):
+    # "Download: 12.34 Mbps | 1.54 MBps", or dashes while there is no reading
+    if mbps is None:
+        return f"{label}: -- Mbps | -- MBps" if per_byte else f"{label}: -- Mbps"
+    if per_byte:
+        return f"{label}: {mbps:.2f} Mbps | {mbps / 8:.2f} MBps"
+    return f"{label}: {mbps:.2f} Mbps"
+
+
+def total_text(label, nbytes=0):
+    return f"{label}: {nbytes / MB:.2f} MB"
+
+
+def streams_text(per_stream_mbps=None):
+    if not per_stream_mbps:
+        return "Streams: --"
+    rates = ", ".join(f"{r:.0f}" for r in per_stream_mbps)
+    return f"Streams: {len(per_stream_mbps)} ({rates} Mbps)"
+
+
+def interfaces_text(update):
+    # Per-interface receive/transmit rates of a passive-mode update
+    rates = ", ".join(f"{name} {i['rx_mbps']:.1f}/{i['tx_mbps']:.1f}" for name, i in update["interfaces"].items())
+    return f"Interfaces (RX/TX Mbps): {rates or '--'}"
+
+
+def current_latency(summary):
+    # The loaded figures while under load, else the idle baseline
+    return summary.get("loaded") or summary.get("idle")
+
+
+def latency_text(summary):
+    def ms(values, key, digits=0):
+        value = values.get(key) if values else None
+        return f"{value:.{digits}f}" if value is not None else "--"
+    idle, loaded, current = summary.get("idle"), summary.get("loaded"), current_latency(summary)
+    return (f"Latency: idle {ms(idle, 'rtt_ms', 1)} ms | loaded {ms(loaded, 'rtt_ms', 1)} ms | "
+            f"jitter {ms(current, 'jitter_ms', 1)} ms | TTFB {ms(current, 'ttfb_ms')} ms")
+
+
+def profile_text(profile):
+    # One-line summary of a result's self-profile
+    return (f"CPU {profile['process_cpu_pct']:.0f}%, {profile['overhead_us_per_chunk'] or 0:.1f} us bookkeeping "
+            f"per chunk" + (f" - {profile['warning']}" if profile.get("client_bound") else ""))
@@ -0,0 +1,95 @@
+import tkinter as tk
+from threading import Thread
+from ..transfer import TEST_URL, DOWNLOAD_STREAMS
+from ..speed_engine import DownloadTest
+from ..launcher import startup_check
+from .ui_pipeline import MetricsQueue, TestRunner, FRAME_INTERVAL
+from .readouts import rate_text, total_text, streams_text, interfaces_text
+
+CHUNK_SIZE = 256 * 1024  # 256 KB
+
+class RealTimeSpeedMonitor:
+    def __init__(self, root):
+        self.root = root
+        self.root.title("Live Speed Monitor (Streaming 200 MB)")
+        self.root.geometry("500x335")
+        self.running = False
+        self.runner = None
+        self.metrics = MetricsQueue()  # Filled by the worker thread, drained by Tk
+
+        tk.Label(root, text="Streaming 200 MB (estimates every 500ms)", font=("Arial", 12)).pack(pady=10)
+        self.download_label = tk.Label(root, text=rate_text("Download"), font=("Arial", 12))
+        self.download_label.pack(pady=5)
+        self.total_downloaded_label = tk.Label(root, text=total_text("Downloaded"), font=("Arial", 12))
+        self.total_downloaded_label.pack(pady=5)
+        self.streams_label = tk.Label(root, text=streams_text(), font=("Arial", 9), fg="gray")
+        self.streams_label.pack()
+        self.status_label = tk.Label(root, text="Status: Idle", font=("Arial", 10), fg="gray")
+        self.status_label.pack(pady=5)
+
+        tk.Button(root, text="Start", command=self.start_monitor, bg="green", fg="white", width=10).pack(pady=5)
+        tk.Button(root, text="Stop", command=self.stop_monitor, bg="red", fg="white", width=10).pack()
+        tk.Button(root, text="Passive", command=self.start_passive, width=10).pack(pady=5)
+        self.root.after(int(FRAME_INTERVAL * 1000), self.drain_metrics)
+
+    def drain_metrics(self):
+        latest, events = self.metrics.drain()
+        if "download" in latest and self.running:
+            self.show_progress(latest["download"])
+        if "passive" in latest and self.running:
+            self.show_passive(latest["passive"])
+        for event, value in events:
+            if event.endswith(".error"):
+                self.download_label.config(text="Error")
+                self.status_label.config(text=f"Status: {value}", fg="red")
+        self.root.after(int(FRAME_INTERVAL * 1000), self.drain_metrics)
+
+    def show_progress(self, update):
+        self.download_label.config(text=rate_text("Download", update["mbps"]))
+        self.total_downloaded_label.config(text=total_text("Downloaded", update["bytes"]))
+        self.streams_label.config(text=streams_text(update["per_stream_mbps"]))
+        self.status_label.config(text="Status: Downloading...", fg="blue")
+
+    def show_passive(self, update):
+        self.download_label.config(text=" | ".join((rate_text("RX", update["rx_mbps"], per_byte=False),
+                                                     rate_text("TX", update["tx_mbps"], per_byte=False))))
+        self.total_downloaded_label.config(text=" | ".join((total_text("Received", update["rx_bytes"]),
+                                                             total_text("Sent", update["tx_bytes"]))))
+        self.streams_label.config(text=interfaces_text(update))
+        self.status_label.config(text="Status: Passive (no test traffic)", fg="blue")
+
+    def start(self, name, test):
+        # Runs on a background thread: the runner only pushes into self.metrics, never touches widgets
+        self.running = True
+        self.metrics.clear()
+        self.runner = TestRunner(name, test, self.metrics)
+        Thread(target=self.runner.run, daemon=True).start()
+
+    def start_passive(self):
+        if not self.running:
+            from ..passive_monitor import PassiveMonitor
+            self.start("passive", PassiveMonitor())
+
+    def start_monitor(self):
+        if not self.running:
+            self.start("download", DownloadTest(TEST_URL, streams=DOWNLOAD_STREAMS, chunk_size=CHUNK_SIZE))
+
+    def stop_monitor(self):
+        self.running = False
+        if self.runner is not None:
+            self.runner.stop()
+        self.download_label.config(text=rate_text("Download"))
+        self.total_downloaded_label.config(text=total_text("Downloaded"))
+        self.streams_label.config(text=streams_text())
+        self.status_label.config(text="Status: Stopped", fg="gray")
+
+def main(argv=None):
+    root = tk.Tk()
+    RealTimeSpeedMonitor(root)
+    if startup_check():
+        root.after(0, root.destroy)  # Startup benchmark: quit once the window is up
+    root.mainloop()
+    return 0
+
+if __name__ == "__main__":
+    main()
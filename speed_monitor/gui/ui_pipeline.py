@@ -0,0 +1,86 @@
+import time
+from collections import deque
+
+# Hand-off between measurement threads and a GUI thread.
+#
+# Workers push into a MetricsQueue and never touch widgets or wait on the UI.
+# The UI drains it on its own timer (Tk after(), Qt QTimer) at FRAME_INTERVAL,
+# keeps only the newest value per metric and drops values that have gone
+# stale. Events (done, error) are delivered in order and never dropped.
+# TestRunner is the worker side, shared by both front ends.
+
+FRAME_INTERVAL = 0.05  # Seconds between UI drains (20 frames per second)
+STALE_AFTER = 1.0  # Metric values older than this when drained are skipped
+MAX_PENDING = 4096  # Bound on queued metric values; the oldest go first
+
+
+class MetricsQueue:
+    def __init__(self, stale_after=STALE_AFTER, max_pending=MAX_PENDING):
+        self.stale_after = stale_after
+        # deque.append/popleft are atomic, so neither side needs a lock
+        self.metrics = deque(maxlen=max_pending)
+        self.events = deque()
+        self.dropped = 0
+
+    def push(self, key, value):
+        self.metrics.append((time.monotonic(), key, value))
+
+    def push_event(self, key, value=None):
+        self.events.append((key, value))
+
+    def drain(self):
+        # Returns ({key: latest fresh value}, [(event, value), ...])
+        latest = {}
+        cutoff = time.monotonic() - self.stale_after
+        for _ in range(len(self.metrics)):
+            stamp, key, value = self.metrics.popleft()
+            if stamp < cutoff:
+                self.dropped += 1
+                continue
+            if key in latest:
+                self.dropped += 1
+            latest[key] = value
+        events = [self.events.popleft() for _ in range(len(self.events))]
+        return latest, events
+
+    def clear(self):
+        self.metrics.clear()
+        self.events.clear()
+
+
+class TestRunner:
+    # Runs a speed_engine test or a PassiveMonitor on the calling thread (a
+    # threading.Thread in Tk, a QThread in Qt) and reports under `name`:
+    #   metrics  <name> (progress), latency, <name>.profile
+    #   events   <name>.done (result) or <name>.error (message), then <name>.finished
+    def __init__(self, name, test, metrics):
+        self.name = name
+        self.test = test
+        self.metrics = metrics
+
+    def run(self):
+        # Returns the result, or None if the test failed
+        try:
+            result = self.test.run(self.on_progress)
+            self.metrics.push_event(f"{self.name}.done", result)
+            return result
+        except Exception as e:
+            self.metrics.push_event(f"{self.name}.error", str(e))
+            return None
+        finally:
+            self.metrics.push_event(f"{self.name}.finished")
+
+    def on_progress(self, update):
+        self.metrics.push(self.name, update)
+        if "latency" in update:
+            self.metrics.push("latency", update["latency"])
+        if "profile" in update:
+            self.metrics.push(f"{self.name}.profile", update["profile"])
+
+    def set_profiling(self, enabled):
+        profiler = getattr(self.test, "profiler", None)
+        if profiler is not None:
+            profiler.enable() if enabled else profiler.disable()
+
+    def stop(self):
+        self.test.stop()
@@ -0,0 +1,324 @@
+import os
+import math
+import mmap
+import queue
+import struct
+import threading
+from collections import namedtuple
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, one writer per history file
+    fcntl = None
+
+# Append-only, memory-mapped measurement history.
+#
+# history.bin holds fixed-width records in time order after a small header, so
+# a time range is found by binary search without reading the rest of the file.
+# Alongside it, history.<res>.bin files hold per-minute/hour/day rollups that
+# are kept up to date as records are appended. Several processes (the GUI and
+# a cron'd CLI) may append to the same files: every write holds an exclusive
+# flock and first re-reads the record count another writer may have bumped.
+
+DEFAULT_PATH = os.path.join(os.path.expanduser("~"), ".speed_monitor", "history.bin")
+MAGIC = b"SPDH"
+VERSION = 1
+HEADER = struct.Struct("<4sHHQ")  # magic, version, record size, record count
+HEADER_SIZE = 64
+GROW_BYTES = 1024 * 1024  # File grows in 1 MB steps
+ROLLUPS = (60, 3600, 86400)  # 1 min, 1 h, 1 day
+
+DOWNLOAD = 0
+UPLOAD = 1
+DIRECTIONS = {"download": DOWNLOAD, "upload": UPLOAD}
+
+# timestamp (unix s), direction, rate (bits/s), bytes, latency (s, NaN if not measured)
+RECORD = struct.Struct("<dB7xdQd")
+Record = namedtuple("Record", "timestamp direction rate bytes latency")
+
+# bucket start, direction, samples, rate sum/min/max, bytes, latency sum, latency samples
+ROLLUP = struct.Struct("<dB7xQdddQdQ")
+Rollup = namedtuple("Rollup", "start direction count rate_sum rate_min rate_max bytes latency_sum latency_count")
+
+
+def direction_code(direction):
+    return DIRECTIONS[direction] if isinstance(direction, str) else direction
+
+
+class RecordFile:
+    # One append-only file of fixed-width records, mapped into memory
+    def __init__(self, path, record, readonly=False):
+        self.path = path
+        self.record = record
+        self.readonly = readonly
+        if not readonly:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            if not os.path.exists(path) or os.path.getsize(path) < HEADER_SIZE:
+                with open(path, "wb") as f:
+                    f.write(HEADER.pack(MAGIC, VERSION, record.size, 0).ljust(HEADER_SIZE, b"\0"))
+        self.file = open(path, "rb" if readonly else "r+b")
+        self.map = None
+        self.lock_depth = 0
+        self._map()
+        magic, version, size, self.count = HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC or size != record.size:
+            self.close()
+            raise ValueError(f"{path} is not a speed monitor history file")
+
+    def _map(self):
+        if self.map is not None:
+            self.map.close()
+        access = mmap.ACCESS_READ if self.readonly else mmap.ACCESS_WRITE
+        self.map = mmap.mmap(self.file.fileno(), 0, access=access)
+
+    def refresh(self):
+        # Pick up records appended by another process
+        if os.fstat(self.file.fileno()).st_size != len(self.map):
+            self._map()
+        self.count = HEADER.unpack_from(self.map, 0)[3]
+
+    @contextmanager
+    def locked(self):
+        # Exclusive against other writers of this file; re-entrant within this object
+        if self.lock_depth == 0:
+            if fcntl is not None:
+                fcntl.flock(self.file.fileno(), fcntl.LOCK_EX)
+            try:
+                self.refresh()
+            except BaseException:
+                if fcntl is not None:
+                    fcntl.flock(self.file.fileno(), fcntl.LOCK_UN)
+                raise
+        self.lock_depth += 1
+        try:
+            yield self
+        finally:
+            self.lock_depth -= 1
+            if self.lock_depth == 0 and fcntl is not None:
+                fcntl.flock(self.file.fileno(), fcntl.LOCK_UN)
+
+    def offset(self, index):
+        return HEADER_SIZE + index * self.record.size
+
+    def get(self, index):
+        return self.record.unpack_from(self.map, self.offset(index))
+
+    def put(self, index, values):
+        self.record.pack_into(self.map, self.offset(index), *values)
+
+    def append(self, values):
+        with self.locked():
+            self._grow()
+            self.put(self.count, values)
+            self._commit()
+
+    def insert(self, index, values):
+        # Only needed when another writer already appended records that sort after `values`
+        with self.locked():
+            self._grow()
+            self.map.move(self.offset(index + 1), self.offset(index), (self.count - index) * self.record.size)
+            self.put(index, values)
+            self._commit()
+
+    def _grow(self):
+        end = self.offset(self.count + 1)
+        if end > len(self.map):
+            size = max(end, len(self.map) + GROW_BYTES)
+            # Windows refuses to resize a file while it is mapped
+            self.map.close()
+            self.map = None
+            self.file.truncate(size)
+            self._map()
+
+    def _commit(self):
+        self.count += 1
+        # The count is written last, so a crash never exposes a half-written record
+        HEADER.pack_into(self.map, 0, MAGIC, VERSION, self.record.size, self.count)
+
+    def bisect(self, timestamp):
+        # First index whose timestamp is >= `timestamp`
+        lo, hi = 0, self.count
+        unpack = struct.Struct("<d").unpack_from
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if unpack(self.map, self.offset(mid))[0] < timestamp:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def range(self, start=None, end=None):
+        first = 0 if start is None else self.bisect(start)
+        last = self.count if end is None else self.bisect(end)
+        for i in range(first, last):
+            yield self.get(i)
+
+    def flush(self):
+        self.map.flush()
+
+    def close(self):
+        if self.map is not None:
+            self.map.close()
+            self.map = None
+        self.file.close()
+
+
+class HistoryStore:
+    def __init__(self, path=DEFAULT_PATH, readonly=False):
+        self.path = path
+        self.readonly = readonly
+        self.records = RecordFile(path, RECORD, readonly)
+        base = os.path.splitext(path)[0]
+        self.rollups = {}
+        for resolution in ROLLUPS:
+            rollup_path = f"{base}.{resolution}.bin"
+            if readonly and not os.path.exists(rollup_path):
+                continue
+            self.rollups[resolution] = RecordFile(rollup_path, ROLLUP, readonly)
+        self.pending = {}  # (resolution, direction) -> open bucket not yet written out
+        self.last_timestamp = self.records.get(self.records.count - 1)[0] if self.records.count else 0.0
+
+    def append(self, timestamp, direction, rate, nbytes=0, latency=math.nan):
+        direction = direction_code(direction)
+        with self.records.locked() as records:
+            # Records must stay in time order for the binary search; clamp clock steps
+            # back, and records another process appended after our last one
+            if records.count:
+                self.last_timestamp = max(self.last_timestamp, records.get(records.count - 1)[0])
+            timestamp = max(timestamp, self.last_timestamp)
+            self.last_timestamp = timestamp
+            records.append((timestamp, direction, rate, nbytes, latency))
+        for resolution in self.rollups:
+            self._roll(resolution, timestamp, direction, rate, nbytes, latency)
+
+    def _roll(self, resolution, timestamp, direction, rate, nbytes, latency):
+        start = timestamp - timestamp % resolution
+        # Close every older bucket at this resolution, whatever its direction,
+        # so the rollup file stays sorted by bucket start
+        for key in [k for k, b in self.pending.items() if k[0] == resolution and b[0] < start]:
+            self._write_bucket(resolution, self.pending.pop(key))
+        key = (resolution, direction)
+        bucket = self.pending.get(key)
+        if bucket is None:
+            bucket = self.pending[key] = [start, direction, 0, 0.0, math.inf, -math.inf, 0, 0.0, 0]
+        bucket[2] += 1
+        bucket[3] += rate
+        bucket[4] = min(bucket[4], rate)
+        bucket[5] = max(bucket[5], rate)
+        bucket[6] += nbytes
+        if not math.isnan(latency):
+            bucket[7] += latency
+            bucket[8] += 1
+
+    def _write_bucket(self, resolution, bucket):
+        with self.rollups[resolution].locked() as rollups:
+            # The bucket may already be on disk, written before a restart or by another
+            # process: merge into it. Otherwise insert it where it sorts, which is the
+            # end unless another writer has already closed a later bucket.
+            index = rollups.bisect(bucket[0])
+            while index < rollups.count:
+                existing = rollups.get(index)
+                if existing[0] != bucket[0]:
+                    break
+                if existing[1] == bucket[1]:
+                    rollups.put(index, merge_rollups(existing, bucket))
+                    return
+                index += 1
+            if index == rollups.count:
+                rollups.append(bucket)
+            else:
+                rollups.insert(index, bucket)
+
+    def query(self, start=None, end=None, direction=None):
+        # Raw records with start <= timestamp < end
+        self._refresh()
+        direction = None if direction is None else direction_code(direction)
+        for values in self.records.range(start, end):
+            if direction is None or values[1] == direction:
+                yield Record(*values)
+
+    def rollup(self, resolution, start=None, end=None, direction=None):
+        # Pre-aggregated buckets, including the ones still being filled
+        self._refresh()
+        direction = None if direction is None else direction_code(direction)
+        rows = list(self.rollups[resolution].range(start, end)) if resolution in self.rollups else []
+        for (res, d), bucket in self.pending.items():
+            if res == resolution and (start is None or bucket[0] >= start) and (end is None or bucket[0] < end):
+                for i, row in enumerate(rows):
+                    if row[0] == bucket[0] and row[1] == d:
+                        rows[i] = merge_rollups(row, bucket)
+                        break
+                else:
+                    rows.append(tuple(bucket))
+        rows.sort(key=lambda row: (row[0], row[1]))
+        return [Rollup(*row) for row in rows if direction is None or row[1] == direction]
+
+    def _refresh(self):
+        if self.readonly:
+            self.records.refresh()
+            for rollups in self.rollups.values():
+                rollups.refresh()
+
+    def flush(self):
+        self.records.flush()
+        for rollups in self.rollups.values():
+            rollups.flush()
+
+    def close(self):
+        if not self.readonly:
+            for (resolution, _), bucket in self.pending.items():
+                self._write_bucket(resolution, bucket)
+            self.pending.clear()
+            self.flush()
+        self.records.close()
+        for rollups in self.rollups.values():
+            rollups.close()
+
+
+def merge_rollups(a, b):
+    return (a[0], a[1], a[2] + b[2], a[3] + b[3], min(a[4], b[4]), max(a[5], b[5]),
+            a[6] + b[6], a[7] + b[7], a[8] + b[8])
+
+
+class HistoryWriter:
+    # Owns a HistoryStore on a background thread. record() never blocks: if the
+    # writer falls behind, readings are dropped and counted instead.
+    def __init__(self, path=DEFAULT_PATH, max_pending=10000):
+        self.path = path
+        self.queue = queue.Queue(max_pending)
+        self.dropped = 0
+        self.error = None
+        self.store = HistoryStore(path)
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def record(self, timestamp, direction, rate, nbytes=0, latency=math.nan):
+        try:
+            self.queue.put_nowait((timestamp, direction, rate, nbytes, latency))
+        except queue.Full:
+            self.dropped += 1
+
+    def problem(self):
+        # Why readings are not all being recorded, or None; for the front ends to show
+        if self.error is not None:
+            return f"history not recorded: {self.error}"
+        if self.dropped:
+            return f"{self.dropped} history readings dropped (writer fell behind)"
+        return None
+
+    def run(self):
+        store = self.store
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+            try:
+                store.append(*item)
+            except Exception as e:
+                self.error = e
+        store.close()
+
+    def close(self, timeout=5):
+        self.queue.put(None)
+        self.thread.join(timeout)
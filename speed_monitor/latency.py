@@ -0,0 +1,161 @@
+import time
+import socket
+import threading
+import http.client
+from collections import deque
+from urllib.parse import urlsplit
+
+# Lightweight latency prober that runs next to the throughput tests.
+#
+# Each probe times a TCP connect (one round trip) and a tiny GET over a
+# kept-alive connection (time to first byte). Samples are filed under the
+# load that was running at the time - idle, download, upload or both - so
+# idle and loaded latency (bufferbloat) can be compared directly.
+
+PROBE_INTERVAL = 0.25  # Seconds between probes
+PROBE_TIMEOUT = 2.0
+IDLE_PROBE_SECONDS = 1.0  # Idle baseline collected before a test starts
+SAMPLES_KEPT = 120  # Per phase
+
+
+def probe_url(test_url):
+    # Zero-byte variant of a /__down test URL, or the URL itself otherwise
+    parts = urlsplit(test_url)
+    if parts.path.endswith("/__down"):
+        return f"{parts.scheme}://{parts.netloc}{parts.path}?bytes=0"
+    return test_url
+
+
+def summarize(rtts, ttfbs, lost):
+    summary = {"samples": len(rtts), "lost": lost}
+    if rtts:
+        ordered = sorted(rtts)
+        summary["rtt_ms"] = ordered[len(ordered) // 2] * 1000
+        summary["rtt_min_ms"] = ordered[0] * 1000
+        # Jitter as the mean difference between consecutive samples (RFC 3550 style)
+        diffs = [abs(b - a) for a, b in zip(rtts, rtts[1:])]
+        summary["jitter_ms"] = sum(diffs) / len(diffs) * 1000 if diffs else 0.0
+    if ttfbs:
+        ordered = sorted(ttfbs)
+        summary["ttfb_ms"] = ordered[len(ordered) // 2] * 1000
+    return summary
+
+
+class LatencyProber:
+    def __init__(self, url, interval=PROBE_INTERVAL, timeout=PROBE_TIMEOUT, exporter=None):
+        self.url = probe_url(url)
+        self.exporter = exporter  # metrics_exporter.MetricsExporter, or None
+        parts = urlsplit(self.url)
+        self.https = parts.scheme == "https"
+        self.host = parts.hostname
+        self.port = parts.port or (443 if self.https else 80)
+        self.path = (parts.path or "/") + ("?" + parts.query if parts.query else "")
+        self.interval = interval
+        self.timeout = timeout
+        self.lock = threading.Lock()
+        self.loads = set()
+        self.rtts = {}
+        self.ttfbs = {}
+        self.lost = {}
+        self.conn = None
+        self.running = False
+        self.thread = None
+        self._wake = threading.Event()
+
+    @property
+    def phase(self):
+        return "+".join(sorted(self.loads)) or "idle"
+
+    def begin_load(self, direction):
+        with self.lock:
+            self.loads.add(direction)
+
+    def end_load(self, direction):
+        with self.lock:
+            self.loads.discard(direction)
+
+    def start(self):
+        if not self.running:
+            self.running = True
+            self._wake.clear()
+            self.thread = threading.Thread(target=self.run, daemon=True)
+            self.thread.start()
+
+    def stop(self, wait=True):
+        # wait=False never blocks (for a UI thread); the probe in flight finishes in the background
+        self.running = False
+        self._wake.set()
+        if wait and self.thread is not None:
+            self.thread.join(self.timeout + 1)
+
+    def run(self):
+        try:
+            while self.running:
+                phase = self.phase
+                try:
+                    rtt = self.tcp_rtt()
+                    ttfb = self.http_ttfb()
+                    self.add(phase, rtt, ttfb)
+                except (OSError, http.client.HTTPException):
+                    self.close()
+                    with self.lock:
+                        self.lost[phase] = self.lost.get(phase, 0) + 1
+                self._wake.wait(self.interval)
+        finally:
+            self.close()  # The connection belongs to this thread
+
+    def tcp_rtt(self):
+        start = time.perf_counter()
+        sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        rtt = time.perf_counter() - start
+        sock.close()
+        return rtt
+
+    def http_ttfb(self):
+        if self.conn is None:
+            cls = http.client.HTTPSConnection if self.https else http.client.HTTPConnection
+            self.conn = cls(self.host, self.port, timeout=self.timeout)
+            self.conn.connect()  # Handshake is kept out of the measurement
+        start = time.perf_counter()
+        self.conn.request("GET", self.path)
+        response = self.conn.getresponse()
+        ttfb = time.perf_counter() - start
+        response.read()
+        if response.will_close:
+            self.close()
+        return ttfb
+
+    def add(self, phase, rtt, ttfb):
+        with self.lock:
+            self.rtts.setdefault(phase, deque(maxlen=SAMPLES_KEPT)).append(rtt)
+            self.ttfbs.setdefault(phase, deque(maxlen=SAMPLES_KEPT)).append(ttfb)
+        if self.exporter is not None:
+            self.exporter.observe_latency(self.url, phase, rtt)
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+    def latest_rtt(self, phase=None):
+        with self.lock:
+            samples = self.rtts.get(phase or self.phase)
+            return samples[-1] if samples else None
+
+    def summary(self, phase):
+        with self.lock:
+            return summarize(list(self.rtts.get(phase, ())), list(self.ttfbs.get(phase, ())),
+                             self.lost.get(phase, 0))
+
+    def snapshot(self):
+        with self.lock:
+            phases = set(self.rtts) | set(self.lost)
+        return {phase: self.summary(phase) for phase in sorted(phases)}
+
+    def loaded_summary(self):
+        # Headline latency figures for a progress update: idle vs. current load
+        current = self.phase
+        result = {"phase": current, "idle": self.summary("idle")}
+        if current != "idle":
+            result["loaded"] = self.summary(current)
+        return result
@@ -0,0 +1,50 @@
+import os
+import sys
+import importlib
+
+# Entry points. Each command imports only the module that implements it, so
+# the sink never loads a GUI toolkit, the CLI never loads Qt or Tk, and the
+# GUIs never load the sink. Run as `python -m speed_monitor <command> ...`;
+# the scripts at the top of the repository are shims onto the same commands.
+
+COMMANDS = {
+    "gui": "speed_monitor.gui.qt_app",  # PyQt6 window (the default)
+    "tk": "speed_monitor.gui.tk_app",  # Tkinter window
+    "cli": "speed_monitor.speed_cli",  # Headless tests, JSON lines
+    "sink": "speed_monitor.sink_server",  # Upload sink and local /__down origin
+    "benchmark": "speed_monitor.speed_benchmark",  # Loopback throughput benchmark
+    "startup": "speed_monitor.startup_benchmark",  # Import-time and startup benchmark
+}
+DEFAULT_COMMAND = "gui"
+STARTUP_CHECK = "SPEED_MONITOR_STARTUP_CHECK"  # When set, a GUI quits as soon as its window is up
+
+
+def startup_check():
+    return bool(os.environ.get(STARTUP_CHECK))
+
+
+def metrics_port(argv):
+    # --metrics-port [PORT] (default 9464), or None when not given
+    if '--metrics-port' not in argv:
+        return None
+    from .metrics_exporter import METRICS_PORT
+    i = argv.index('--metrics-port') + 1
+    return int(argv[i]) if i < len(argv) and argv[i].isdigit() else METRICS_PORT
+
+
+def start_exporter(port):
+    from .metrics_exporter import MetricsExporter
+    exporter = MetricsExporter()
+    exporter.start(port)
+    print(f"[Exporter] Serving metrics on port {port}")
+    return exporter
+
+
+def main(argv=None):
+    argv = list(sys.argv[1:] if argv is None else argv)
+    command = argv.pop(0) if argv and argv[0] in COMMANDS else DEFAULT_COMMAND
+    if command == "gui" and "--server" in argv:
+        # The PyQt app's --server flag: run the sink without loading Qt
+        argv.remove("--server")
+        command = "sink"
+    return importlib.import_module(COMMANDS[command]).main(argv)
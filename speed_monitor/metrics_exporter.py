@@ -0,0 +1,267 @@
+import sys
+import time
+import bisect
+import threading
+from collections import deque
+from urllib.parse import urlsplit
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Prometheus / OpenMetrics exporter for continuous monitoring.
+#
+# Measurement threads only append observations to a deque (atomic, no lock).
+# A scrape drains whatever arrived since the last one into fixed-size
+# histograms under a lock only the exporter takes, then renders them. The
+# deque is bounded, so byte counters are not sent through it: each producer
+# thread adds to running totals of its own, which no other thread writes, and
+# a scrape sums them without a lock. The cost of a scrape depends on the number
+# of label sets and buckets, never on how long the monitor has been running.
+#
+#   python -m speed_monitor.metrics_exporter [port]   # standalone, mostly for testing
+#   python -m speed_monitor cli both --every 5m --metrics-port 9464
+#   python -m speed_monitor gui --metrics-port 9464 [--server]
+
+METRICS_HOST = ""  # All interfaces, like other exporters
+METRICS_PORT = 9464
+PREFIX = "speed_monitor"
+MAX_PENDING = 100_000  # Bound on samples between scrapes; the oldest go first
+# Bucket upper bounds: throughput in bits/s, latency in seconds
+THROUGHPUT_BUCKETS = tuple(m * 1_000_000 for m in (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000))
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+OPENMETRICS = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+PROMETHEUS_TEXT = "text/plain; version=0.0.4; charset=utf-8"
+
+THROUGHPUT = 0
+LATENCY = 1
+RESULT = 2
+
+
+def target_label(url):
+    return urlsplit(url).netloc or url
+
+
+def escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{escape(v)}"' for k, v in labels) + "}"
+
+
+def format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    # Fixed buckets; observe() is O(log buckets)
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def lines(self, name, labels):
+        cumulative = 0
+        for bound, count in zip(self.bounds + (float("inf"),), self.counts):
+            cumulative += count
+            yield f"{name}_bucket{format_labels(labels + (('le', format_value(float(bound))),))} {cumulative}"
+        yield f"{name}_sum{format_labels(labels)} {format_value(self.sum)}"
+        yield f"{name}_count{format_labels(labels)} {self.count}"
+
+
+class ByteCounter:
+    # Running byte totals of one producer thread; only that thread writes them
+    def __init__(self):
+        self.owner = threading.current_thread()
+        self.totals = {}  # (target, direction) -> bytes
+
+
+class MetricsExporter:
+    def __init__(self, max_pending=MAX_PENDING):
+        self.pending = deque(maxlen=max_pending)
+        self.lock = threading.Lock()  # Taken by scrapes only
+        self.counters = set()  # ByteCounters of producer threads; each added by its owner
+        self._local = threading.local()
+        self.bytes = {}  # (target, direction) -> bytes from producers that have exited
+        self.throughput = {}  # (target, direction) -> Histogram
+        self.latency = {}  # (target, phase) -> Histogram
+        self.results = {}  # (target, direction) -> (last result dict, when it finished)
+        self.collectors = []  # Callables returning extra (name, type, help, [(labels, value)])
+        self.server = None
+        self.thread = None
+
+    # Called from measurement threads: append only, or write the thread's own counter
+
+    def add_bytes(self, url, direction, nbytes):
+        if nbytes:
+            counter = getattr(self._local, "counter", None)
+            if counter is None:
+                counter = self._local.counter = ByteCounter()
+                self.counters.add(counter)
+            key = (target_label(url), direction)
+            counter.totals[key] = counter.totals.get(key, 0) + nbytes
+
+    def observe_throughput(self, url, direction, bps):
+        self.pending.append((THROUGHPUT, target_label(url), direction, bps))
+
+    def observe_latency(self, url, phase, seconds):
+        self.pending.append((LATENCY, target_label(url), phase, seconds))
+
+    def record_result(self, result):
+        self.pending.append((RESULT, target_label(result.get("url", "")), result["direction"], (result, time.time())))
+
+    def add_collector(self, collector):
+        self.collectors.append(collector)
+
+    # Scrape side
+
+    def _drain(self):
+        for _ in range(len(self.pending)):
+            kind, target, label, value = self.pending.popleft()
+            key = (target, label)
+            if kind == THROUGHPUT:
+                histogram = self.throughput.get(key)
+                if histogram is None:
+                    histogram = self.throughput[key] = Histogram(THROUGHPUT_BUCKETS)
+                histogram.observe(value)
+            elif kind == LATENCY:
+                histogram = self.latency.get(key)
+                if histogram is None:
+                    histogram = self.latency[key] = Histogram(LATENCY_BUCKETS)
+                histogram.observe(value)
+            else:
+                self.results[key] = value
+
+    def byte_totals(self):
+        # Sum of every producer's counter. A counter whose thread has exited is
+        # final, so it is folded into self.bytes and dropped: the set of counters
+        # doesn't grow with every test thread the GUI starts.
+        for counter in list(self.counters):
+            if not counter.owner.is_alive():
+                self.counters.discard(counter)
+                for key, nbytes in counter.totals.items():
+                    self.bytes[key] = self.bytes.get(key, 0) + nbytes
+        totals = dict(self.bytes)
+        for counter in list(self.counters):
+            for key, nbytes in list(counter.totals.items()):
+                totals[key] = totals.get(key, 0) + nbytes
+        return totals
+
+    def families(self):
+        # (name, type, help, [(labels, value)]) for the simple metrics
+        last = [((("target", t), ("direction", d)), r, finished)
+                for (t, d), (r, finished) in sorted(self.results.items())]
+
+        def gauge(field, scale=1):
+            return [(labels, r[field] * scale) for labels, r, _ in last if r.get(field) is not None]
+
+        totals = sorted(self.byte_totals().items())
+        loaded_rtt = []
+        for labels, r, _ in last:
+            loaded = (r.get("latency") or {}).get("loaded") or {}
+            if loaded.get("rtt_ms") is not None:
+                loaded_rtt.append((labels, loaded["rtt_ms"] / 1000))
+        families = [
+            (f"{PREFIX}_bytes", "counter", "Bytes transferred by speed tests",
+             [((("target", t), ("direction", d)), v) for (t, d), v in totals]),
+            (f"{PREFIX}_last_test_bits_per_second", "gauge", "Steady-state rate of the last test",
+             gauge("mbps", 1_000_000)),
+            (f"{PREFIX}_last_test_bytes", "gauge", "Bytes transferred by the last test", gauge("bytes")),
+            (f"{PREFIX}_last_test_duration_seconds", "gauge", "Length of the last test", gauge("seconds")),
+            (f"{PREFIX}_last_test_timestamp_seconds", "gauge", "When the last test finished",
+             [(labels, finished) for labels, _, finished in last]),
+            (f"{PREFIX}_last_test_loaded_rtt_seconds", "gauge", "Median RTT under load in the last test",
+             loaded_rtt),
+        ]
+        for collector in self.collectors:
+            families.extend(collector())
+        return families
+
+    def render(self, openmetrics=False):
+        with self.lock:
+            self._drain()
+            lines = []
+            for name, kind, help_text, samples in self.families():
+                sample_name = name + "_total" if kind == "counter" else name
+                # OpenMetrics names the counter family without _total; the classic text format with it
+                family = name if openmetrics else sample_name
+                lines.append(f"# HELP {family} {help_text}")
+                lines.append(f"# TYPE {family} {kind}")
+                for labels, value in samples:
+                    lines.append(f"{sample_name}{format_labels(labels)} {format_value(value)}")
+            for name, help_text, histograms in (
+                    (f"{PREFIX}_throughput_bits_per_second", "Throughput samples taken during tests", self.throughput),
+                    (f"{PREFIX}_latency_seconds", "Latency probe round-trip times", self.latency)):
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} histogram")
+                label_name = "direction" if histograms is self.throughput else "phase"
+                for (target, label), histogram in sorted(histograms.items()):
+                    lines.extend(histogram.lines(name, (("target", target), (label_name, label))))
+        if openmetrics:
+            lines.append("# EOF")
+        return ("\n".join(lines) + "\n").encode()
+
+    def start(self, port=METRICS_PORT, host=METRICS_HOST):
+        handler = type("Handler", (ExporterHandler,), {"exporter": self})
+        self.server = ThreadingHTTPServer((host, port), handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self.server.server_address[1]
+
+    def close(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+
+class ExporterHandler(BaseHTTPRequestHandler):
+    exporter = None
+
+    def do_GET(self):
+        path = urlsplit(self.path).path
+        if path not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        openmetrics = "application/openmetrics-text" in self.headers.get("Accept", "")
+        body = self.exporter.render(openmetrics)
+        self.send_response(200)
+        self.send_header("Content-Type", OPENMETRICS if openmetrics else PROMETHEUS_TEXT)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # Scrapes every few seconds would flood the console
+
+
+def sink_collector(stats):
+    # Exposes a sink_server.SinkStats; plain attribute reads, so no sink lock is taken
+    def collect():
+        return [
+            (f"{PREFIX}_sink_received_bytes", "counter", "Bytes received by the upload sink",
+             [((), stats.total_bytes)]),
+            (f"{PREFIX}_sink_requests", "counter", "Requests handled by the upload sink", [((), stats.requests)]),
+        ]
+    return collect
+
+
+if __name__ == "__main__":
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else METRICS_PORT
+    exporter = MetricsExporter()
+    print(f"[Exporter] Serving metrics on port {exporter.start(port)}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        exporter.close()
@@ -0,0 +1,235 @@
+import os
+import time
+import threading
+from datetime import datetime, timezone
+from .estimator import ThroughputEstimator, HEADLINE_WINDOW
+
+# Passive mode: watches the kernel's per-interface byte counters instead of
+# running a test, so it shows what the host is already pushing and costs no
+# bandwidth. Rates go through the same ThroughputEstimator as the active tests.
+#
+# /proc/net/dev is read with pread() on a descriptor kept open for the whole
+# run. The kernel returns it about a page per call, so a 10 Hz sample is one
+# syscall per page plus one for the end of file, and a small parse. The sysfs
+# source reads /sys/class/net/<if>/statistics/{rx,tx}_bytes the same way.
+
+SAMPLE_INTERVAL = 0.1  # Seconds between counter reads (10 Hz)
+PROGRESS_INTERVAL = 0.5  # Seconds between progress callbacks
+RESCAN_INTERVAL = 2.0  # sysfs: how often to look for new interfaces
+PROC_NET_DEV = "/proc/net/dev"
+SYS_CLASS_NET = "/sys/class/net"
+READ_SIZE = 64 * 1024
+COUNTER_32 = 2 ** 32
+MAX_WRAP_DELTA = 2 ** 31  # Larger "wrapped" deltas (170 Gbps at 10 Hz) mean a reset
+
+
+def counter_delta(previous, current):
+    # Bytes between two readings of a kernel counter
+    if current >= previous:
+        return current - previous
+    wrapped = current + COUNTER_32 - previous
+    if previous < COUNTER_32 and wrapped < MAX_WRAP_DELTA:
+        return wrapped  # 32-bit counter wrapped
+    return current  # The interface was reset (64-bit counters don't wrap in practice)
+
+
+def parse_proc_net_dev(data):
+    # {interface: (rx_bytes, tx_bytes)} from the contents of /proc/net/dev
+    counters = {}
+    for line in data.split(b"\n")[2:]:
+        name, sep, fields = line.partition(b":")
+        if not sep:
+            continue
+        values = fields.split()
+        counters[name.strip().decode()] = (int(values[0]), int(values[8]))
+    return counters
+
+
+class ProcNetDev:
+    def __init__(self, path=PROC_NET_DEV):
+        self.fd = os.open(path, os.O_RDONLY)
+
+    def read(self):
+        # A /proc file hands out at most about a page per read, whatever the size asked for
+        parts, offset = [], 0
+        while True:
+            data = os.pread(self.fd, READ_SIZE, offset)
+            if not data:
+                break
+            parts.append(data)
+            offset += len(data)
+        return parse_proc_net_dev(b"".join(parts))
+
+    def close(self):
+        os.close(self.fd)
+
+
+class SysClassNet:
+    # One pair of open statistics files per interface, rescanned periodically
+    def __init__(self, root=SYS_CLASS_NET):
+        self.root = root
+        self.fds = {}  # interface -> (rx fd, tx fd)
+        self.last_scan = None
+
+    def scan(self):
+        present = set(os.listdir(self.root))
+        for name in list(self.fds):
+            if name not in present:
+                self.forget(name)
+        for name in present - set(self.fds):
+            stats = os.path.join(self.root, name, "statistics")
+            try:
+                rx = os.open(os.path.join(stats, "rx_bytes"), os.O_RDONLY)
+            except OSError:
+                continue
+            try:
+                tx = os.open(os.path.join(stats, "tx_bytes"), os.O_RDONLY)
+            except OSError:
+                os.close(rx)
+                continue
+            self.fds[name] = (rx, tx)
+        self.last_scan = time.monotonic()
+
+    def forget(self, name):
+        for fd in self.fds.pop(name):
+            os.close(fd)
+
+    def read(self):
+        if self.last_scan is None or time.monotonic() - self.last_scan >= RESCAN_INTERVAL:
+            self.scan()
+        counters = {}
+        for name, (rx, tx) in list(self.fds.items()):
+            try:
+                counters[name] = (int(os.pread(rx, 32, 0)), int(os.pread(tx, 32, 0)))
+            except (OSError, ValueError):
+                self.forget(name)  # Interface went away between scans
+        return counters
+
+    def close(self):
+        for name in list(self.fds):
+            self.forget(name)
+
+
+class Interface:
+    def __init__(self, name, rx, tx, now):
+        self.name = name
+        self.last = (rx, tx)
+        self.rx_bytes = 0
+        self.tx_bytes = 0
+        self.rx = ThroughputEstimator()
+        self.tx = ThroughputEstimator()
+        self.rx.start(now)
+        self.tx.start(now)
+
+    def update(self, rx, tx, now):
+        rx_delta = counter_delta(self.last[0], rx)
+        tx_delta = counter_delta(self.last[1], tx)
+        self.last = (rx, tx)
+        self.rx_bytes += rx_delta
+        self.tx_bytes += tx_delta
+        self.rx.add(rx_delta, now)
+        self.tx.add(tx_delta, now)
+
+
+class PassiveMonitor:
+    # Same run(on_progress) / stop() shape as the speed_engine tests. Receive
+    # is reported as the download side and transmit as the upload side.
+    direction = "passive"
+
+    def __init__(self, interfaces=None, include_loopback=False, source="proc", duration=None,
+                 sample_interval=SAMPLE_INTERVAL, interval=PROGRESS_INTERVAL):
+        self.only = set(interfaces) if interfaces else None
+        self.include_loopback = include_loopback or bool(self.only and "lo" in self.only)
+        self.source = source  # "proc" or "sysfs"
+        self.duration = duration  # None runs until stop()
+        self.sample_interval = sample_interval
+        self.interval = interval
+        self.interfaces = {}
+        self.running = True
+        self._wake = threading.Event()
+
+    def stop(self):
+        self.running = False
+        self._wake.set()
+
+    def wanted(self, name):
+        if self.only is not None:
+            return name in self.only
+        return self.include_loopback or name != "lo"
+
+    def sample(self, reader, now):
+        counters = reader.read()
+        for name in [n for n in self.interfaces if n not in counters]:
+            del self.interfaces[name]  # Interface disappeared
+        for name, (rx, tx) in counters.items():
+            iface = self.interfaces.get(name)
+            if iface is not None:
+                iface.update(rx, tx, now)
+            elif self.wanted(name):
+                self.interfaces[name] = Interface(name, rx, tx, now)  # Rates start from the next reading
+
+    def progress(self, now):
+        per_interface = {
+            name: {
+                "rx_mbps": iface.rx.rate(HEADLINE_WINDOW, now) / 1_000_000,
+                "tx_mbps": iface.tx.rate(HEADLINE_WINDOW, now) / 1_000_000,
+                "rx_bytes": iface.rx_bytes,
+                "tx_bytes": iface.tx_bytes,
+            }
+            for name, iface in sorted(self.interfaces.items())
+        }
+        return {
+            "type": "progress",
+            "direction": self.direction,
+            "rx_mbps": sum(i["rx_mbps"] for i in per_interface.values()),
+            "tx_mbps": sum(i["tx_mbps"] for i in per_interface.values()),
+            "rx_bytes": sum(i["rx_bytes"] for i in per_interface.values()),
+            "tx_bytes": sum(i["tx_bytes"] for i in per_interface.values()),
+            "interfaces": per_interface,
+        }
+
+    def run(self, on_progress=None):
+        reader = SysClassNet() if self.source == "sysfs" else ProcNetDev()
+        started = time.time()
+        start_time = time.perf_counter()
+        next_sample = start_time
+        last_update = start_time
+        try:
+            while self.running:
+                now = time.perf_counter()
+                self.sample(reader, now)
+                if now - last_update >= self.interval:
+                    last_update = now
+                    if on_progress:
+                        on_progress(self.progress(now))
+                if self.duration is not None and now - start_time >= self.duration:
+                    break
+                # Fixed cadence: sleep to the next tick rather than for a full interval
+                next_sample = max(next_sample + self.sample_interval, now)
+                self._wake.wait(next_sample - time.perf_counter())
+        finally:
+            reader.close()
+        return self.result(started, time.perf_counter() - start_time)
+
+    def result(self, started, elapsed):
+        interfaces = {}
+        for name, iface in sorted(self.interfaces.items()):
+            rx, tx = iface.rx.snapshot(), iface.tx.snapshot()
+            interfaces[name] = {
+                "rx_bytes": iface.rx_bytes,
+                "tx_bytes": iface.tx_bytes,
+                "rx_mbps": rx["mean"] / 1_000_000,
+                "tx_mbps": tx["mean"] / 1_000_000,
+                "rx_mbps_p90": rx["p90"] / 1_000_000,
+                "tx_mbps_p90": tx["p90"] / 1_000_000,
+            }
+        return {
+            "type": "result",
+            "direction": self.direction,
+            "timestamp": datetime.fromtimestamp(started, timezone.utc).isoformat(),
+            "seconds": round(elapsed, 3),
+            "source": self.source,
+            "rx_bytes": sum(i["rx_bytes"] for i in interfaces.values()),
+            "tx_bytes": sum(i["tx_bytes"] for i in interfaces.values()),
+            "interfaces": interfaces,
+        }
@@ -0,0 +1,223 @@
+import os
+import time
+import atexit
+import signal
+import threading
+import multiprocessing
+from .estimator import ThroughputEstimator, WINDOWS, RESOLUTION, HEADLINE_WINDOW
+
+# Multi-process transfer mode: spreads download or upload streams over worker
+# processes, so one interpreter (and its GIL) stops being the ceiling on
+# multi-gigabit links.
+#
+# Every stream owns one slot in a shared array of byte counters and is the
+# only writer to it, so counting needs no lock and nothing is pickled per
+# chunk. The coordinator reads the array every RESOLUTION seconds and feeds
+# the growth into an ordinary ThroughputEstimator. Each worker also has a
+# shared status byte and error buffer. A shared stop flag, polled rather than
+# waited on (a process killed while waiting on a multiprocessing Event can
+# leave set() blocked forever), stops them all, and a worker whose parent has
+# died stops itself, so no process outlives the test.
+
+DEFAULT_PROCESSES = os.cpu_count() or 1
+STREAMS_PER_PROCESS = 2
+ERROR_SIZE = 256  # Bytes of error message kept per worker
+START_TIMEOUT = 30.0
+JOIN_TIMEOUT = 5.0
+CHECK_INTERVAL = 0.1  # Seconds between a worker's stop-flag and health checks
+PARENT_CHECK_INTERVAL = 0.5
+
+STARTING, RUNNING, DONE, FAILED = range(4)
+
+
+def watch_parent(on_orphaned, interval=PARENT_CHECK_INTERVAL, grace=JOIN_TIMEOUT):
+    # Calls on_orphaned() once the parent process has gone, then exits the
+    # process outright if it is still around `grace` seconds later
+    parent = os.getppid()
+
+    def watch():
+        while os.getppid() == parent:
+            time.sleep(interval)
+        threading.Thread(target=on_orphaned, daemon=True).start()
+        time.sleep(grace)
+        os._exit(1)
+    threading.Thread(target=watch, daemon=True).start()
+
+
+def upload_stream(upload, counters, slot, failures):
+    # Repeats chunked POSTs over one kept-alive connection until stopped
+    try:
+        while upload.running:
+            for sent in upload.send():
+                counters[slot] += sent
+    except Exception as e:
+        failures.append(e)
+    finally:
+        upload.close()
+
+
+def worker_main(index, direction, url, streams, chunk_size, total, counters, status, errors, stop):
+    # Entry point of a worker process. Ctrl+C reaches the whole process group;
+    # the coordinator decides when workers stop.
+    from .transfer import ConnectionPool, DownloadStream, StreamingUpload
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    watch_parent(lambda: setattr(stop, "value", 1))
+    slots = range(index * streams, (index + 1) * streams)
+    transfers, threads, failures = [], [], []
+    pool = None
+    try:
+        if direction == "download":
+            pool = ConnectionPool(url)
+            pool.prewarm(streams)
+            for slot in slots:
+                def on_bytes(n, slot=slot):
+                    counters[slot] += n
+                stream = DownloadStream(slot, url, chunk_size, on_bytes, pool=pool)
+                transfers.append(stream)
+                threads.append(stream.thread)
+        else:
+            for slot in slots:
+                upload = StreamingUpload(url, total, chunk_size)
+                upload.connect()
+                transfers.append(upload)
+                threads.append(threading.Thread(target=upload_stream, args=(upload, counters, slot, failures),
+                                                daemon=True))
+        for thread in threads:
+            thread.start()
+        status[index] = RUNNING
+        while not stop.value:
+            time.sleep(CHECK_INTERVAL)
+            if not any(thread.is_alive() for thread in threads):
+                failures += [t.error for t in transfers if getattr(t, "error", None) is not None]
+                if failures:
+                    raise failures[0]
+                break
+        status[index] = DONE
+    except Exception as e:
+        message = f"{type(e).__name__}: {e}".encode(errors="replace")[:ERROR_SIZE]
+        errors[index * ERROR_SIZE:(index + 1) * ERROR_SIZE] = message.ljust(ERROR_SIZE, b"\0")
+        status[index] = FAILED
+    finally:
+        for transfer in transfers:
+            transfer.stop()
+        if pool is not None:
+            pool.close()
+
+
+class ProcessPoolTransfer:
+    # Coordinator side, shaped like transfer.MultiStreamDownload: start(),
+    # sample(), stats(), total_bytes, restart_estimate(), stop().
+    def __init__(self, direction, url, processes=DEFAULT_PROCESSES, streams=STREAMS_PER_PROCESS,
+                 chunk_size=None, total=None):
+        from .transfer import STREAM_CHUNK_SIZE, UPLOAD_CHUNK_SIZE, UPLOAD_TOTAL
+        self.direction = direction  # "download" or "upload"
+        self.url = url
+        self.processes = processes
+        self.streams = streams  # Per process
+        self.chunk_size = chunk_size or (STREAM_CHUNK_SIZE if direction == "download" else UPLOAD_CHUNK_SIZE)
+        self.total = total or UPLOAD_TOTAL  # Upload: bytes per POST
+        # Spawned rather than forked: the parent may be a GUI with threads running
+        self.context = multiprocessing.get_context("spawn")
+        self.counters = self.context.RawArray('Q', processes * streams)
+        self.status = self.context.RawArray('b', processes)
+        self.errors = self.context.RawArray('c', processes * ERROR_SIZE)
+        self.stop_flag = self.context.RawValue('b', 0)
+        self.workers = []
+        self.lock = threading.Lock()
+        self.estimator = ThroughputEstimator(windows=WINDOWS)
+        self.last_error = None
+        self._seen = 0
+        self._last_sample = None
+        self._last_worker_bytes = [0] * processes
+        self._poller = None
+        self._stopped = threading.Event()
+
+    @property
+    def total_bytes(self):
+        return sum(self.counters)
+
+    @property
+    def active_workers(self):
+        return sum(1 for i, w in enumerate(self.workers) if w.is_alive() and self.status[i] == RUNNING)
+
+    def worker_bytes(self, index):
+        return sum(self.counters[index * self.streams:(index + 1) * self.streams])
+
+    def error(self, index):
+        return self.errors[index * ERROR_SIZE:(index + 1) * ERROR_SIZE].rstrip(b"\0").decode(errors="replace")
+
+    def start(self, timeout=START_TIMEOUT):
+        # Returns once every worker has connected, so neither process start-up
+        # nor handshakes count towards the rate
+        atexit.register(self.stop)
+        for index in range(self.processes):
+            worker = self.context.Process(
+                target=worker_main, name=f"{self.direction}-worker-{index}", daemon=True,
+                args=(index, self.direction, self.url, self.streams, self.chunk_size, self.total,
+                      self.counters, self.status, self.errors, self.stop_flag))
+            worker.start()
+            self.workers.append(worker)
+        deadline = time.monotonic() + timeout
+        while STARTING in self.status[:] and time.monotonic() < deadline:
+            if FAILED in self.status[:] or not all(w.is_alive() for w in self.workers):
+                break
+            time.sleep(0.01)
+        if self.status[:] != [RUNNING] * self.processes:
+            failed = [self.error(i) for i in range(self.processes) if self.status[i] == FAILED]
+            self.stop()
+            raise ConnectionError(failed[0] if failed else "Transfer workers did not start")
+        now = time.perf_counter()
+        self._seen = self.total_bytes
+        self._last_sample = now
+        self._last_worker_bytes = [self.worker_bytes(i) for i in range(self.processes)]
+        self.estimator.start(now)
+        self._poller = threading.Thread(target=self.poll, daemon=True)
+        self._poller.start()
+
+    def poll(self):
+        while not self._stopped.wait(RESOLUTION):
+            total = self.total_bytes
+            with self.lock:
+                self.estimator.add(total - self._seen, time.perf_counter())
+            self._seen = total
+
+    def sample(self):
+        # Returns (headline aggregate_bps, [per_process_bps since the last call])
+        now = time.perf_counter()
+        elapsed = now - self._last_sample
+        self._last_sample = now
+        per_process = []
+        for i in range(self.processes):
+            current = self.worker_bytes(i)
+            per_process.append((current - self._last_worker_bytes[i]) * 8 / elapsed if elapsed > 0 else 0.0)
+            self._last_worker_bytes[i] = current
+            if self.status[i] == FAILED:
+                self.last_error = ConnectionError(self.error(i))
+        with self.lock:
+            return self.estimator.rate(HEADLINE_WINDOW, now), per_process
+
+    def stats(self):
+        with self.lock:
+            return self.estimator.snapshot()
+
+    def restart_estimate(self):
+        with self.lock:
+            self.estimator.reset(time.perf_counter())
+
+    def stop(self, timeout=JOIN_TIMEOUT):
+        # Ask, then terminate, then kill: no worker outlives the coordinator
+        self.stop_flag.value = 1
+        self._stopped.set()
+        atexit.unregister(self.stop)
+        deadline = time.monotonic() + timeout
+        for worker in self.workers:
+            worker.join(max(0.0, deadline - time.monotonic()))
+        for worker in self.workers:
+            if worker.is_alive():
+                worker.terminate()
+                worker.join(1.0)
+            if worker.is_alive():
+                worker.kill()
+                worker.join()
+        if self._poller is not None:
+            self._poller.join()
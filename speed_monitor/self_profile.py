@@ -0,0 +1,169 @@
+import os
+import time
+import threading
+
+# Client self-profiling: is a low result the network or this process?
+#
+# Transfer loops call io() around every read/send while the profiler is
+# enabled. Each thread writes only its own ThreadProfile, so there are no
+# locks; when disabled the loops pay one attribute check per chunk. snapshot()
+# turns the counters into shares of wall time:
+#
+#   io            time inside read/send calls (GIL released, waiting on the socket)
+#   bookkeeping   time between calls (accounting, callbacks, waiting for the GIL)
+#   cpu           process CPU and the CPU of each transfer thread
+#
+# and flags the result "client-bound" when CPU, not the network, is the limit.
+# Each thread reads its own CPU clock (time.thread_time() in io()) rather than
+# being read through its thread id, which may belong to an exited thread by the
+# time snapshot() runs; an exited thread is dropped after its last interval.
+
+CLIENT_BOUND_THREAD = 0.9  # A transfer thread on CPU for this share of wall time
+CLIENT_BOUND_GIL = 0.9  # Summed bookkeeping share across threads (they contend for one GIL)
+CLIENT_BOUND_PROCESS = 0.9  # Process CPU as a share of all cores
+CPU_COUNT = os.cpu_count() or 1
+
+
+class ThreadProfile:
+    # Created by, and only written by, the thread it profiles
+    def __init__(self, name):
+        self.owner = threading.current_thread()
+        self.name = name
+        self.io_seconds = 0.0
+        self.loop_seconds = 0.0  # From one I/O call to the next, I/O included
+        self.chunks = 0
+        self.bytes = 0
+        self.last_start = None
+        self.cpu = self.start_cpu = time.thread_time()  # CPU seconds of this thread as of its last io()
+
+    def io(self, started, finished, nbytes):
+        # Call after each read/send with perf_counter() stamps around the call
+        if self.last_start is not None:
+            self.loop_seconds += started - self.last_start
+        self.last_start = started
+        self.io_seconds += finished - started
+        self.chunks += 1
+        self.bytes += nbytes
+        self.cpu = time.thread_time()
+
+
+class ClientProfiler:
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.reset()
+
+    def enable(self):
+        if not self.enabled:
+            self.reset()
+            self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def toggle(self, *_):
+        # Usable as a signal handler
+        self.disable() if self.enabled else self.enable()
+
+    def reset(self):
+        self.threads = set()  # ThreadProfiles; each added by the thread that owns it
+        self._local = threading.local()
+        self._previous = (time.perf_counter(), time.process_time(), {})
+        self.samples = 0
+        self.bound_samples = 0
+        self.worst = None
+        # Sums over every snapshot with transfer activity, for report()
+        self.totals = {"wall": 0.0, "cpu": 0.0, "io": 0.0, "bookkeeping": 0.0, "chunks": 0, "busiest": 0.0}
+
+    def thread(self, name=None):
+        # The calling thread's ThreadProfile, created on first use
+        profile = getattr(self._local, "profile", None)
+        if profile is None:
+            profile = self._local.profile = ThreadProfile(name or threading.current_thread().name)
+            self.threads.add(profile)
+        return profile
+
+    def snapshot(self):
+        # Shares of wall time since the previous snapshot, or None while disabled
+        if not self.enabled:
+            return None
+        now, cpu = time.perf_counter(), time.process_time()
+        last_now, last_cpu, last_threads = self._previous
+        wall = now - last_now
+        if wall <= 0:
+            return None
+        threads, current = [], {}
+        for t in list(self.threads):
+            if not t.owner.is_alive():
+                self.threads.discard(t)  # Its counters are final: this is its last interval
+            current[t] = (t.io_seconds, t.loop_seconds, t.chunks, t.cpu)
+            io, loop, chunks, last_thread_cpu = last_threads.get(t, (0.0, 0.0, 0, t.start_cpu))
+            io, loop, chunks = t.io_seconds - io, t.loop_seconds - loop, t.chunks - chunks
+            if chunks == 0:
+                continue
+            threads.append({
+                "name": t.name,
+                "cpu_pct": (t.cpu - last_thread_cpu) / wall * 100,
+                "io_pct": io / wall * 100,
+                "bookkeeping_pct": max(0.0, loop - io) / wall * 100,
+                "overhead_us_per_chunk": max(0.0, loop - io) / chunks * 1e6,
+                "chunks": chunks,
+            })
+        self._previous = (now, cpu, current)
+        process_share = (cpu - last_cpu) / wall / CPU_COUNT
+        busiest = max((t["cpu_pct"] for t in threads), default=0.0) / 100
+        gil_share = sum(t["bookkeeping_pct"] for t in threads) / 100
+        reasons = []
+        if process_share >= CLIENT_BOUND_PROCESS:
+            reasons.append(f"process uses {process_share * 100:.0f}% of {CPU_COUNT} cores")
+        if busiest >= CLIENT_BOUND_THREAD:
+            reasons.append(f"a transfer thread is on CPU {busiest * 100:.0f}% of the time")
+        if gil_share >= CLIENT_BOUND_GIL:
+            reasons.append(f"Python bookkeeping holds the GIL {gil_share * 100:.0f}% of the time")
+        chunks = sum(t["chunks"] for t in threads)
+        snapshot = {
+            "process_cpu_pct": (cpu - last_cpu) / wall * 100,
+            "busiest_thread_cpu_pct": busiest * 100,
+            "io_pct": sum(t["io_pct"] for t in threads),
+            "bookkeeping_pct": gil_share * 100,
+            "overhead_us_per_chunk": (sum(t["overhead_us_per_chunk"] * t["chunks"] for t in threads) / chunks
+                                      if chunks else None),
+            "threads": threads,
+            "client_bound": bool(reasons),
+        }
+        if reasons:
+            snapshot["warning"] = "client-bound: " + "; ".join(reasons)
+        if threads:
+            self.samples += 1
+            totals = self.totals
+            totals["wall"] += wall
+            totals["cpu"] += cpu - last_cpu
+            totals["io"] += snapshot["io_pct"] / 100 * wall
+            totals["bookkeeping"] += gil_share * wall
+            totals["chunks"] += chunks
+            totals["busiest"] = max(totals["busiest"], busiest * 100)
+            if reasons:
+                self.bound_samples += 1
+                self.worst = snapshot
+        return snapshot
+
+    def report(self):
+        # Whole-test figures for a result record, and whether the client was the
+        # limit for most of it
+        if not self.enabled:
+            return None
+        self.snapshot()
+        totals = self.totals
+        wall = totals["wall"] or 1.0
+        report = {
+            "process_cpu_pct": totals["cpu"] / wall * 100,
+            "peak_thread_cpu_pct": totals["busiest"],
+            "io_pct": totals["io"] / wall * 100,
+            "bookkeeping_pct": totals["bookkeeping"] / wall * 100,
+            "overhead_us_per_chunk": totals["bookkeeping"] / totals["chunks"] * 1e6 if totals["chunks"] else None,
+            "samples": self.samples,
+            "client_bound_samples": self.bound_samples,
+            "client_bound": self.samples > 0 and self.bound_samples * 2 >= self.samples,
+        }
+        if report["client_bound"]:
+            report["warning"] = self.worst["warning"]
+        return report
@@ -0,0 +1,298 @@
+import sys
+import json
+import argparse
+import time
+import signal
+import socket
+import threading
+from urllib.parse import urlsplit, parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SINK_HOST = "localhost"
+SINK_PORT = 8000
+READ_BUFFER_SIZE = 1024 * 1024  # 1 MB, allocated once per connection
+WRITE_CHUNK_SIZE = 1024 * 1024  # Largest single write when serving /__down
+PACED_CHUNK_SIZE = 64 * 1024  # Smaller writes when rate limiting, so pacing stays smooth
+ORIGIN_PAYLOAD = bytes(WRITE_CHUNK_SIZE)
+
+
+class SinkStats:
+    # Server-side counters, shared by all handler threads
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.total_bytes = 0
+        self.requests = 0
+        self.active = 0
+        self.first_byte = None
+        self.last_byte = None
+        self.last_request = None
+
+    def begin(self):
+        with self.lock:
+            self.active += 1
+            self.requests += 1
+
+    def add(self, n):
+        now = time.perf_counter()
+        with self.lock:
+            self.total_bytes += n
+            if self.first_byte is None:
+                self.first_byte = now
+            self.last_byte = now
+
+    def end(self, report):
+        with self.lock:
+            self.active -= 1
+            self.last_request = report
+
+    def snapshot(self):
+        with self.lock:
+            busy = (self.last_byte - self.first_byte) if self.first_byte is not None else 0
+            return {
+                "total_bytes": self.total_bytes,
+                "requests": self.requests,
+                "active": self.active,
+                "uptime": time.time() - self.started,
+                "mbps": self.total_bytes * 8 / busy / 1_000_000 if busy > 0 else 0.0,
+                "last_request": self.last_request,
+            }
+
+    def reset(self):
+        with self.lock:
+            self.total_bytes = 0
+            self.requests = self.active
+            self.first_byte = None
+            self.last_byte = None
+            self.last_request = None
+
+
+class SinkHandler(BaseHTTPRequestHandler):
+    # Drains POST bodies (Content-Length or chunked) into a reusable buffer and
+    # replies with what the server actually received. GET /stats returns the totals.
+    protocol_version = "HTTP/1.1"  # Keep-alive, so a client can reuse one connection
+
+    def setup(self):
+        super().setup()
+        self.stats = self.server.stats
+        self.buffer = bytearray(READ_BUFFER_SIZE)
+        self.view = memoryview(self.buffer)
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        self.stats.begin()
+        start = time.perf_counter()
+        received = 0
+        try:
+            if "chunked" in self.headers.get("Transfer-Encoding", "").lower():
+                received = self.drain_chunked()
+            else:
+                received = self.drain(int(self.headers.get("Content-Length", 0)))
+        except (OSError, ValueError):
+            self.close_connection = True
+        elapsed = time.perf_counter() - start
+        report = {
+            "bytes": received,
+            "seconds": elapsed,
+            "mbps": received * 8 / elapsed / 1_000_000 if elapsed > 0 else 0.0,
+        }
+        self.stats.end(report)
+        if not self.close_connection:
+            self.send_json(report)
+        print(f"[Server] Received POST: {received} bytes")
+
+    def do_GET(self):
+        if self.path.split("?")[0] == "/stats":
+            self.send_json(self.stats.snapshot())
+        else:
+            self.send_error(404)
+
+    def do_DELETE(self):
+        if self.path == "/stats":
+            self.stats.reset()
+            self.send_json(self.stats.snapshot())
+        else:
+            self.send_error(404)
+
+    def drain(self, length):
+        received = 0
+        while received < length:
+            n = self.rfile.readinto(self.view[:min(len(self.buffer), length - received)])
+            if not n:
+                raise ValueError("Connection closed before end of body")
+            received += n
+            self.stats.add(n)
+        return received
+
+    def drain_chunked(self):
+        received = 0
+        while True:
+            line = self.rfile.readline(1024)
+            if not line:
+                raise ValueError("Connection closed inside chunked body")
+            size = int(line.split(b";", 1)[0].strip(), 16)
+            if size == 0:
+                break
+            received += self.drain(size)
+            self.rfile.readline(3)  # CRLF after each chunk
+        while self.rfile.readline(1024) not in (b"\r\n", b"\n", b""):
+            pass  # Trailer headers
+        return received
+
+    def send_json(self, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class OriginHandler(SinkHandler):
+    # Sink plus a local stand-in for the Cloudflare download endpoint:
+    #   GET /__down?bytes=N[&rate=Mbps][&latency=ms][&stall=s][&stall_at=bytes]
+    # rate caps this connection, latency delays the response headers, and stall
+    # pauses the body once stall_at bytes (default: half way) have been sent.
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        if parts.path != "/__down":
+            return super().do_GET()
+        try:
+            query = {k: v[-1] for k, v in parse_qs(parts.query).items()}
+            length = int(query.get("bytes", 0))
+            rate = float(query.get("rate", 0)) * 1_000_000 / 8  # bytes/s, 0 = unlimited
+            latency = float(query.get("latency", 0)) / 1000
+            stall = float(query.get("stall", 0))
+            stall_at = int(query.get("stall_at", length // 2))
+        except ValueError:
+            return self.send_error(400)
+        if latency:
+            time.sleep(latency)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("Content-Length", str(length))
+        self.end_headers()
+        try:
+            self.serve_bytes(length, rate, stall, stall_at)
+        except OSError:
+            self.close_connection = True
+
+    def serve_bytes(self, length, rate, stall, stall_at):
+        payload = memoryview(ORIGIN_PAYLOAD)
+        step = PACED_CHUNK_SIZE if rate else WRITE_CHUNK_SIZE
+        sent = 0
+        start = time.perf_counter()
+        while sent < length:
+            if stall and sent == stall_at:
+                time.sleep(stall)
+                start += stall  # A stall is not made up for by bursting afterwards
+                stall = 0
+            n = min(step, length - sent)
+            if stall and sent < stall_at < sent + n:
+                n = stall_at - sent  # Stop exactly at the stall point
+            self.wfile.write(payload[:n])
+            sent += n
+            if rate:
+                ahead = start + sent / rate - time.perf_counter()
+                if ahead > 0:
+                    time.sleep(ahead)
+
+
+class SinkServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128  # Many clients may connect at once
+
+    def __init__(self, address, handler=OriginHandler, reuse_port=False):
+        self.stats = SinkStats()
+        self.allow_reuse_port = reuse_port  # Several processes accepting on one port
+        super().__init__(address, handler)
+
+
+def make_server(host=SINK_HOST, port=SINK_PORT, handler=OriginHandler, reuse_port=False):
+    return SinkServer((host, port), handler, reuse_port)
+
+
+def serve_process(host, port):
+    # One of run_server()'s worker processes; the kernel spreads connections
+    # across them. Exits by itself if the parent goes away.
+    from .process_pool import watch_parent
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    server = make_server(host, port, reuse_port=True)
+    watch_parent(lambda: threading.Thread(target=server.shutdown, daemon=True).start())
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+
+
+def run_server_processes(host, port, processes):
+    # The sink in several processes, so the loopback origin can keep up with
+    # multi-process tests. GET /stats only covers the process that answers it.
+    import multiprocessing
+    if not hasattr(socket, "SO_REUSEPORT"):
+        raise OSError("Multi-process sink needs SO_REUSEPORT")
+    context = multiprocessing.get_context("spawn")
+    workers = [context.Process(target=serve_process, args=(host, port), daemon=True) for _ in range(processes)]
+
+    def terminate(*_):
+        raise KeyboardInterrupt
+    signal.signal(signal.SIGTERM, terminate)  # Clean up the workers when terminated too
+    print(f'Listening on http://{host}:{port} with {processes} processes ...')
+    try:
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for worker in workers:
+            if worker.is_alive():
+                worker.terminate()
+        for worker in workers:
+            worker.join()
+
+
+def run_server(host=SINK_HOST, port=SINK_PORT, exporter=None, processes=1):
+    # `exporter` is a metrics_exporter.MetricsExporter to publish the sink totals on
+    if processes > 1:
+        if exporter is not None:
+            raise ValueError("The metrics exporter needs a single-process sink")
+        return run_server_processes(host, port, processes)
+    server = make_server(host, port)
+    if exporter is not None:
+        from .metrics_exporter import sink_collector
+        exporter.add_collector(sink_collector(server.stats))
+    print(f'Listening on http://{host}:{port} ...')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def main(argv=None):
+    from .metrics_exporter import METRICS_PORT
+    from .launcher import start_exporter
+    parser = argparse.ArgumentParser(prog="sink_server.py", description="Upload sink and local /__down origin.")
+    parser.add_argument("port", nargs="?", type=int, default=SINK_PORT, help=f"Port to listen on (default: {SINK_PORT})")
+    parser.add_argument("processes", nargs="?", type=int, default=1,
+                        help="Processes accepting on the port, for multi-process tests (default: 1)")
+    parser.add_argument("--host", default=SINK_HOST, help=f"Address to listen on (default: {SINK_HOST})")
+    parser.add_argument("--metrics-port", type=int, nargs="?", const=METRICS_PORT,
+                        help=f"Serve Prometheus/OpenMetrics sink totals on this port (default: {METRICS_PORT})")
+    args = parser.parse_args(argv)
+    exporter = start_exporter(args.metrics_port) if args.metrics_port is not None else None
+    try:
+        run_server(args.host, args.port, exporter, args.processes)
+    finally:
+        if exporter is not None:
+            exporter.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
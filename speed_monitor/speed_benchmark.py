@@ -0,0 +1,167 @@
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import subprocess
+import tracemalloc
+from .speed_engine import DownloadTest, UploadTest, MultiProcessTest
+from .process_pool import DEFAULT_PROCESSES
+
+# Loopback benchmark for the client itself. Starts the local origin/sink
+# (sink_server.py) in a separate process, so the CPU figures are the client's
+# alone, then drives the download and upload paths against it.
+#
+#   python speed_benchmark.py                 # all scenarios, table output
+#   python speed_benchmark.py --json          # one JSON object per scenario
+#   python speed_benchmark.py --only download-1 upload-stream
+#   python speed_benchmark.py --memory        # also trace peak Python heap per scenario
+#   python speed_benchmark.py --processes 4   # worker processes for the *-mp scenarios and the sink
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # Directory holding the package
+DEFAULT_DURATION = 3.0
+ORIGIN_BYTES = 10 ** 12  # Effectively endless; each test stops on its duration
+LEGACY_CHUNK_SIZE = 35 * 1024 * 1024  # What the PyQt download used with iter_content
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class LocalServer:
+    def __init__(self, port=None, processes=1):
+        self.port = port or free_port()
+        self.processes = processes
+        self.base = f"http://127.0.0.1:{self.port}"
+        self.process = None
+
+    def __enter__(self):
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "speed_monitor", "sink", str(self.port), str(self.processes)], cwd=ROOT,
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        deadline = time.monotonic() + 10
+        while time.monotonic() < deadline:
+            try:
+                socket.create_connection(("127.0.0.1", self.port), timeout=0.2).close()
+                return self
+            except OSError:
+                time.sleep(0.05)
+        self.process.kill()
+        raise RuntimeError("Local origin/sink did not start")
+
+    def __exit__(self, *exc):
+        self.process.terminate()
+        try:
+            self.process.wait(5)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+
+    def down_url(self, nbytes=ORIGIN_BYTES, **params):
+        query = "".join(f"&{k}={v}" for k, v in params.items())
+        return f"{self.base}/__down?bytes={nbytes}{query}"
+
+
+def scenarios(server, duration, processes=DEFAULT_PROCESSES):
+    # name -> (factory, configured aggregate rate in Mbps or None)
+    return {
+        "download-1": (lambda: DownloadTest(server.down_url(), streams=1, adaptive=False, duration=duration), None),
+        "download-4": (lambda: DownloadTest(server.down_url(), streams=4, adaptive=False, duration=duration), None),
+        "download-1-iter-35mb": (lambda: DownloadTest(server.down_url(), streams=1, adaptive=False,
+                                                      reader="iter_content", chunk_size=LEGACY_CHUNK_SIZE,
+                                                      duration=duration), None),
+        "download-4-iter-35mb": (lambda: DownloadTest(server.down_url(), streams=4, adaptive=False,
+                                                      reader="iter_content", chunk_size=LEGACY_CHUNK_SIZE,
+                                                      duration=duration), None),
+        "download-adaptive": (lambda: DownloadTest(server.down_url(), streams=2, duration=duration), None),
+        "download-limited-200": (lambda: DownloadTest(server.down_url(rate=50), streams=4, adaptive=False,
+                                                      duration=duration), 200.0),
+        "download-limited-1000": (lambda: DownloadTest(server.down_url(rate=1000), streams=1, adaptive=False,
+                                                       duration=duration), 1000.0),
+        "download-stall": (lambda: DownloadTest(server.down_url(rate=400, latency=50, stall=0.5,
+                                                                stall_at=25_000_000),
+                                                streams=1, adaptive=False, duration=duration), None),
+        "upload-stream": (lambda: UploadTest(server.base + "/", total=ORIGIN_BYTES, duration=duration), None),
+        "upload-posts": (lambda: UploadTest(server.base + "/", total=ORIGIN_BYTES, streaming=False,
+                                            duration=duration), None),
+        "download-mp": (lambda: MultiProcessTest("download", server.down_url(), processes=processes,
+                                                 duration=duration), None),
+        "upload-mp": (lambda: MultiProcessTest("upload", server.base + "/", processes=processes,
+                                               duration=duration), None),
+    }
+
+
+def cpu_time():
+    # This process plus its finished children (the *-mp workers, once joined)
+    t = os.times()
+    return t.user + t.system + t.children_user + t.children_system
+
+
+def run_scenario(name, factory, configured, memory=False):
+    test = factory()
+    if memory:
+        tracemalloc.start()
+    cpu_start = cpu_time()
+    wall_start = time.perf_counter()
+    try:
+        result = test.run()
+    finally:
+        wall = time.perf_counter() - wall_start
+        cpu = cpu_time() - cpu_start
+        peak = tracemalloc.get_traced_memory()[1] if memory else None
+        tracemalloc.stop()
+    gigabytes = result["bytes"] / 1e9
+    row = {
+        "scenario": name,
+        "mbps": result["mbps"],
+        "mbps_window": result["mbps_window"],
+        "bytes": result["bytes"],
+        "seconds": wall,
+        "cpu_seconds": cpu,
+        "cpu_per_gb": cpu / gigabytes if gigabytes else None,
+        "configured_mbps": configured,
+        "error_pct": (result["mbps_window"] - configured) / configured * 100 if configured else None,
+        "peak_mb": peak / (1024 * 1024) if peak is not None else None,
+    }
+    if result.get("server"):
+        row["server_mbps"] = result["server"]["mbps"]
+    return row
+
+
+def format_row(row):
+    def fmt(value, width, spec):
+        return f"{'-' if value is None else format(value, spec):>{width}}"
+    return (f"{row['scenario']:<24}{fmt(row['mbps'], 12, '.1f')}{fmt(row['mbps_window'], 12, '.1f')}"
+            f"{fmt(row['cpu_per_gb'], 12, '.3f')}{fmt(row['configured_mbps'], 12, '.0f')}"
+            f"{fmt(row['error_pct'], 10, '+.2f')}{fmt(row['peak_mb'], 10, '.1f')}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the speed monitor client over loopback.")
+    parser.add_argument("--duration", type=float, default=DEFAULT_DURATION, help="Seconds per scenario")
+    parser.add_argument("--only", nargs="+", metavar="SCENARIO", help="Run only these scenarios")
+    parser.add_argument("--json", action="store_true", help="Print JSON lines instead of a table")
+    parser.add_argument("--memory", action="store_true",
+                        help="Trace peak Python heap per scenario (adds some CPU overhead)")
+    parser.add_argument("--processes", type=int, default=DEFAULT_PROCESSES,
+                        help="Worker processes for the *-mp scenarios and the local sink (default: one per core)")
+    args = parser.parse_args(argv)
+    with LocalServer(processes=args.processes) as server:
+        available = scenarios(server, args.duration, args.processes)
+        names = args.only or list(available)
+        unknown = [n for n in names if n not in available]
+        if unknown:
+            parser.error(f"unknown scenario(s): {', '.join(unknown)}; choose from {', '.join(available)}")
+        if not args.json:
+            print(f"{'scenario':<24}{'mean Mbps':>12}{'2s Mbps':>12}{'CPU s/GB':>12}{'target':>12}{'error %':>10}{'peak MB':>10}")
+        for name in names:
+            factory, configured = available[name]
+            row = run_scenario(name, factory, configured, args.memory)
+            print(json.dumps(row) if args.json else format_row(row), flush=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,311 @@
+import os
+import sys
+import json
+import time
+import signal
+import argparse
+from datetime import datetime, timezone
+from .history_store import ROLLUPS
+
+# Headless entry point: runs download/upload tests once or on a schedule and
+# writes one JSON object per line. Deliberately imports no GUI toolkit.
+
+DEFAULT_DURATION = 10.0  # Seconds per test
+DEFAULT_WARMUP = 1.0  # Seconds of slow start kept out of the headline rate
+UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+SIZE_UNITS = {"": 1, "k": 1000, "m": 1000 ** 2, "g": 1000 ** 3,
+              "kib": 1024, "mib": 1024 ** 2, "gib": 1024 ** 3}
+
+
+def parse_seconds(text):
+    # "90", "30s", "15m", "1h", "1d"
+    text = text.strip().lower()
+    if text and text[-1] in UNITS:
+        return float(text[:-1]) * UNITS[text[-1]]
+    return float(text)
+
+
+def parse_size(text):
+    # "200000000", "200m", "1g", "512mib"
+    text = text.strip().lower().removesuffix("b")
+    for suffix in sorted(SIZE_UNITS, key=len, reverse=True):
+        if suffix and text.endswith(suffix):
+            return int(float(text[:-len(suffix)]) * SIZE_UNITS[suffix])
+    return int(text)
+
+
+def parse_percent(text):
+    # "5%", "5" or "0.05" -> 0.05
+    text = text.strip()
+    value = float(text.rstrip("%"))
+    return value / 100 if text.endswith("%") or value >= 1 else value
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="speed_cli.py",
+        description="Headless internet speed tests with JSON-lines output.")
+    parser.add_argument("direction", nargs="?", choices=["download", "upload", "both", "passive", "history"],
+                        default="download",
+                        help="Test to run, 'passive' to watch interface counters without testing, "
+                             "or 'history' to print stored readings")
+    parser.add_argument("--url", help="Download URL (default: Cloudflare 200 MB test file)")
+    parser.add_argument("--upload-url", help="Upload sink URL (default: http://127.0.0.1:8000/)")
+    parser.add_argument("--duration", type=parse_seconds, default=DEFAULT_DURATION,
+                        help="Length of each test, e.g. 10s or 1m (default: 10s)")
+    parser.add_argument("--warmup", type=parse_seconds, default=DEFAULT_WARMUP,
+                        help="Warm-up reported separately from the steady-state rate, 0 to disable (default: 1s)")
+    parser.add_argument("--size", type=parse_size,
+                        help="Byte budget per test, e.g. 100m; the test ends at whichever comes first")
+    parser.add_argument("--adaptive-stop", action="store_true",
+                        help="End each test once the rate estimate has converged (--duration becomes the maximum)")
+    parser.add_argument("--tolerance", type=parse_percent, default=0.05,
+                        help="adaptive stop: 95%% confidence interval width to stop at, e.g. 5%% (default: 5%%)")
+    parser.add_argument("--min-duration", type=parse_seconds, default=3.0,
+                        help="adaptive stop: never stop before this (default: 3s)")
+    parser.add_argument("--streams", type=int, help="Parallel download streams")
+    parser.add_argument("--no-adaptive", action="store_true", help="Keep the download stream count fixed")
+    parser.add_argument("--processes", type=int,
+                        help="Spread the transfer over this many worker processes, for multi-gigabit links; "
+                             "--streams is then per process (default: 2)")
+    parser.add_argument("--interfaces", nargs="+", metavar="IF",
+                        help="passive: interfaces to watch (default: all but loopback)")
+    parser.add_argument("--sample-interval", type=parse_seconds, default=0.1,
+                        help="passive: seconds between counter reads (default: 0.1)")
+    parser.add_argument("--sysfs", action="store_true",
+                        help="passive: read /sys/class/net/*/statistics instead of /proc/net/dev")
+    parser.add_argument("--every", type=parse_seconds,
+                        help="Repeat on this interval, e.g. 15m; aligned to the wall clock")
+    parser.add_argument("--count", type=int, help="Stop after this many scheduled runs")
+    parser.add_argument("--latency", action="store_true",
+                        help="Probe idle and loaded latency, jitter and TTFB alongside the tests")
+    parser.add_argument("--latency-url", help="Host to probe (default: the download URL, or the upload URL)")
+    parser.add_argument("--progress", action="store_true", help="Also emit progress lines while testing")
+    parser.add_argument("--output", "-o", help="Append JSON lines to this file instead of stdout")
+    parser.add_argument("--profile", action="store_true",
+                        help="Profile the client itself and warn when its CPU, not the network, limits the result "
+                             "(toggle at runtime with SIGUSR1)")
+    parser.add_argument("--metrics-port", type=int,
+                        help="Serve Prometheus/OpenMetrics metrics on this port (e.g. 9464) while running")
+    parser.add_argument("--history", metavar="PATH", help="History file (default: ~/.speed_monitor/history.bin)")
+    parser.add_argument("--no-history", action="store_true", help="Don't record readings to the history file")
+    parser.add_argument("--since", type=parse_seconds, default=86400,
+                        help="history: how far back to read, e.g. 6h (default: 1d)")
+    parser.add_argument("--rollup", type=parse_seconds, choices=ROLLUPS, metavar="{60s,1h,1d}",
+                        help="history: print per-minute/hour/day rollups instead of raw readings")
+    return parser
+
+
+class JsonLinesWriter:
+    def __init__(self, path=None):
+        self.file = open(path, "a", encoding="utf-8") if path else sys.stdout
+
+    def write(self, record):
+        self.file.write(json.dumps(record, separators=(",", ":")) + "\n")
+        self.file.flush()
+
+    def close(self):
+        if self.file is not sys.stdout:
+            self.file.close()
+
+
+class Runner:
+    def __init__(self, args, writer, history=None, exporter=None):
+        self.args = args
+        self.writer = writer
+        self.history = history
+        self.exporter = exporter
+        self.profiler = None
+        self.prober = None
+        self.current = None
+        self.stopped = False
+        self.history_problem = None
+
+    def stop(self, *_):
+        self.stopped = True
+        if self.current is not None:
+            self.current.stop()
+
+    def make_tests(self):
+        # Imported here so that argument errors and --help stay instant
+        args = self.args
+        if args.direction == "passive":
+            from .passive_monitor import PassiveMonitor
+            # --duration 0 watches until interrupted
+            return [PassiveMonitor(args.interfaces, source="sysfs" if args.sysfs else "proc",
+                                   duration=args.duration or None, sample_interval=args.sample_interval)]
+        from .speed_engine import DownloadTest, UploadTest, MultiProcessTest
+        common = {"duration": args.duration, "max_bytes": args.size, "history": self.history,
+                  "prober": self.prober, "warmup": args.warmup, "exporter": self.exporter,
+                  "profiler": self.profiler}
+        tests = []
+        if args.processes:
+            return self.make_multiprocess_tests(MultiProcessTest, common)
+        if args.direction in ("download", "both"):
+            kwargs = dict(common, adaptive=not args.no_adaptive)
+            if args.url:
+                kwargs["url"] = args.url
+            if args.streams:
+                kwargs["streams"] = args.streams
+            if args.adaptive_stop:
+                kwargs["converge"] = self.make_detector()
+            tests.append(DownloadTest(**kwargs))
+        if args.direction in ("upload", "both"):
+            kwargs = dict(common)
+            if args.upload_url:
+                kwargs["url"] = args.upload_url
+            if args.size:
+                kwargs["total"] = args.size
+            if args.adaptive_stop:
+                kwargs["converge"] = self.make_detector()
+            tests.append(UploadTest(**kwargs))
+        return tests
+
+    def make_multiprocess_tests(self, test_class, common):
+        args = self.args
+        tests = []
+        for direction, url in (("download", args.url), ("upload", args.upload_url)):
+            if args.direction not in (direction, "both"):
+                continue
+            kwargs = dict(common, direction=direction, url=url, processes=args.processes, streams=args.streams)
+            if args.adaptive_stop:
+                kwargs["converge"] = self.make_detector()
+            tests.append(test_class(**kwargs))
+        return tests
+
+    def make_detector(self):
+        from .estimator import ConvergenceDetector
+        args = self.args
+        return ConvergenceDetector(tolerance=args.tolerance, min_duration=args.min_duration,
+                                   max_duration=args.duration, max_bytes=args.size)
+
+    def make_prober(self):
+        from .latency import LatencyProber
+        from .transfer import TEST_URL, UPLOAD_URL
+        args = self.args
+        url = args.latency_url or (
+            args.upload_url or UPLOAD_URL if args.direction == "upload" else args.url or TEST_URL)
+        return LatencyProber(url, exporter=self.exporter)
+
+    def run_once(self):
+        # Progress lines are the whole point of passive mode
+        on_progress = self.writer.write if self.args.progress or self.args.direction == "passive" else None
+        if self.args.latency:
+            from .latency import IDLE_PROBE_SECONDS
+            self.prober = self.make_prober()
+            self.prober.start()
+            time.sleep(IDLE_PROBE_SECONDS)  # Idle baseline before any load
+        try:
+            self.run_tests(on_progress)
+        finally:
+            if self.prober is not None:
+                self.prober.stop()
+                self.prober = None
+
+    def run_tests(self, on_progress):
+        for test in self.make_tests():
+            if self.stopped:
+                break
+            self.current = test
+            if self.profiler is not None and self.profiler.enabled:
+                self.profiler.reset()  # Each result reports on its own test
+            try:
+                self.writer.write(test.run(on_progress))
+            except Exception as e:
+                self.writer.write({"type": "result", "direction": test.direction,
+                                   "timestamp": datetime.now(timezone.utc).isoformat(), "error": str(e)})
+            finally:
+                self.current = None
+            self.check_history()
+
+    def check_history(self):
+        # Results still go to the output when history recording fails: say so on stderr
+        problem = self.history.problem() if self.history is not None else None
+        if problem is not None and problem != self.history_problem:
+            print(f"Warning: {problem}", file=sys.stderr)
+        self.history_problem = problem
+
+    def run(self):
+        every = self.args.every
+        if not every:
+            self.run_once()
+            return
+        runs = 0
+        while not self.stopped and (self.args.count is None or runs < self.args.count):
+            # Sleep until the next multiple of `every` since the epoch, like cron
+            wait = every - (time.time() % every)
+            deadline = time.monotonic() + wait
+            while not self.stopped and time.monotonic() < deadline:
+                time.sleep(min(1.0, deadline - time.monotonic()))
+            if self.stopped:
+                break
+            self.run_once()
+            runs += 1
+
+
+def print_history(args, writer):
+    from .history_store import HistoryStore, DEFAULT_PATH
+    path = args.history or DEFAULT_PATH
+    if not os.path.exists(path):
+        print(f"No history recorded yet ({path})", file=sys.stderr)
+        return
+    store = HistoryStore(path, readonly=True)
+    names = {0: "download", 1: "upload"}
+    start = time.time() - args.since
+    try:
+        if args.rollup:
+            for row in store.rollup(int(args.rollup), start):
+                record = row._asdict()
+                record["direction"] = names.get(row.direction, row.direction)
+                record["mbps_mean"] = row.rate_sum / row.count / 1_000_000 if row.count else 0.0
+                writer.write(record)
+        else:
+            for row in store.query(start):
+                record = row._asdict()
+                record["direction"] = names.get(row.direction, row.direction)
+                record["latency"] = None if record["latency"] != record["latency"] else record["latency"]
+                writer.write(record)
+    finally:
+        store.close()
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    writer = JsonLinesWriter(args.output)
+    if args.direction == "history":
+        try:
+            print_history(args, writer)
+        finally:
+            writer.close()
+        return 0
+    history = None
+    if not args.no_history:
+        from .history_store import HistoryWriter, DEFAULT_PATH
+        history = HistoryWriter(args.history or DEFAULT_PATH)
+    exporter = None
+    if args.metrics_port is not None:
+        from .metrics_exporter import MetricsExporter
+        exporter = MetricsExporter()
+        exporter.start(args.metrics_port)
+    runner = Runner(args, writer, history, exporter)
+    signal.signal(signal.SIGINT, runner.stop)
+    signal.signal(signal.SIGTERM, runner.stop)
+    if args.direction != "passive":
+        from .self_profile import ClientProfiler
+        runner.profiler = ClientProfiler(args.profile)
+        if hasattr(signal, "SIGUSR1"):
+            signal.signal(signal.SIGUSR1, runner.profiler.toggle)
+    try:
+        runner.run()
+    finally:
+        writer.close()
+        if history is not None:
+            history.close()
+            runner.check_history()
+        if exporter is not None:
+            exporter.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,392 @@
+import os
+import math
+import time
+import threading
+from datetime import datetime, timezone
+from .transfer import (
+    MultiStreamDownload, StreamingUpload, TEST_URL, TEST_BYTES, DOWNLOAD_STREAMS, STREAM_CHUNK_SIZE,
+    UPLOAD_URL, UPLOAD_TOTAL, UPLOAD_CHUNK_SIZE
+)
+from .estimator import ThroughputEstimator, HEADLINE_WINDOW
+
+# UI-independent measurement loops. The Tkinter and PyQt front ends and the
+# headless CLI (speed_cli.py) all drive these; nothing here imports a GUI toolkit.
+
+PROGRESS_INTERVAL = 0.5  # Seconds between progress callbacks
+WARMUP_SECONDS = 1.0  # Slow-start phase measured on its own and left out of the headline rate
+UNREACHABLE_SINK = "Upload server not reachable. Is the sink (--server) running?"
+
+
+def rates_mbps(snapshot):
+    # Estimator snapshot with the bits/s fields converted to Mbps
+    return {k: (v if k in ("total_bytes", "elapsed") else v / 1_000_000) for k, v in snapshot.items()}
+
+
+class SpeedTest:
+    direction = None
+
+    fixed_bytes = None  # Size of the equivalent fixed-size test, for early-stop savings
+
+    def __init__(self, duration=None, max_bytes=None, interval=PROGRESS_INTERVAL, history=None, prober=None,
+                 converge=None, warmup=WARMUP_SECONDS, exporter=None, profiler=None):
+        self.duration = duration  # None runs until stop(); includes the warm-up
+        self.max_bytes = max_bytes
+        self.interval = interval
+        self.history = history  # history_store.HistoryWriter, or None
+        self.prober = prober  # latency.LatencyProber shared by concurrent tests, or None
+        self.converge = converge  # estimator.ConvergenceDetector for an adaptive early stop, or None
+        self.warmup = warmup  # Seconds; 0 measures from the first byte
+        self.exporter = exporter  # metrics_exporter.MetricsExporter, or None
+        self.profiler = profiler  # self_profile.ClientProfiler, switched on and off at runtime, or None
+        self.warmup_end = None  # (elapsed, total_bytes) when the warm-up finished
+        self.handshake = {}
+        self.running = True
+        self._wake = threading.Event()
+        self._history_bytes = 0
+        self._exported_bytes = 0
+        self.last_profile = None
+
+    def record_tick(self, bps, total_bytes):
+        # Non-blocking: the writer drops readings rather than stall the transfer,
+        # and the exporter only queues samples and bumps a byte counter
+        if self.history is not None:
+            rtt = self.prober.latest_rtt() if self.prober is not None else None
+            self.history.record(time.time(), self.direction, bps, total_bytes - self._history_bytes,
+                                math.nan if rtt is None else rtt)
+            self._history_bytes = total_bytes
+        if self.exporter is not None:
+            self.exporter.observe_throughput(self.url, self.direction, bps)
+            self.export_bytes(total_bytes)
+        if self.profiler is not None:
+            self.last_profile = self.profiler.snapshot()
+
+    def export_bytes(self, total_bytes):
+        self.exporter.add_bytes(self.url, self.direction, total_bytes - self._exported_bytes)
+        self._exported_bytes = total_bytes
+
+    def with_diagnostics(self, update):
+        # Adds latency and the self-profile (when switched on) to a progress update
+        if self.prober is not None:
+            update["latency"] = self.prober.loaded_summary()
+        if self.last_profile is not None:
+            update["profile"] = self.last_profile
+        return update
+
+    def begin_load(self):
+        if self.prober is not None:
+            self.prober.begin_load(self.direction)
+
+    def end_load(self):
+        # Returns the latency seen during this test, for the result record
+        if self.prober is None:
+            return {}
+        latency = self.prober.loaded_summary()
+        self.prober.end_load(self.direction)
+        return {"latency": latency}
+
+    def stop(self):
+        self.running = False
+        self._wake.set()
+
+    def warming_up(self, elapsed, total_bytes, restart, finished=False):
+        # Called once per progress tick. Ends the warm-up once it has run its
+        # course, calling restart() so the estimator starts over on steady state.
+        # A test that finishes on this tick keeps what it measured instead.
+        if self.warmup_end is not None:
+            return False
+        if elapsed < self.warmup or (finished and self.warmup):
+            return True
+        self.warmup_end = (elapsed, total_bytes)
+        if self.warmup:
+            restart()
+        return False
+
+    def done(self, elapsed, total_bytes):
+        # Called once per progress tick with totals since the test started. The
+        # caps apply to the whole test, warm-up included; the detector only judges
+        # the steady state, and is told when a cap ended the test instead.
+        if self.max_bytes is not None and total_bytes >= self.max_bytes:
+            limit = "max_bytes"
+        elif self.duration is not None and elapsed >= self.duration:
+            limit = "max_duration"
+        else:
+            limit = None
+        if self.converge is not None:
+            if limit is None and self.warmup_end is not None:
+                steady_elapsed, steady_bytes = elapsed - self.warmup_end[0], total_bytes - self.warmup_end[1]
+                return self.converge.update(steady_elapsed, steady_bytes)
+            if limit is not None and self.converge.reason is None:
+                self.converge.reason = limit
+        return limit is not None
+
+    def result(self, started, snapshot, elapsed, total_bytes, **extra):
+        # `snapshot` covers the steady state only; elapsed/total_bytes the whole test
+        rates = rates_mbps(snapshot)
+        warmup_seconds, warmup_bytes = self.warmup_end or (elapsed, total_bytes)
+        warmup_bps = warmup_bytes * 8 / warmup_seconds if self.warmup and warmup_seconds > 0 else None
+        result = {
+            "type": "result",
+            "direction": self.direction,
+            "timestamp": datetime.fromtimestamp(started, timezone.utc).isoformat(),
+            "bytes": int(total_bytes),
+            "seconds": round(elapsed, 3),
+            "handshake_ms": self.handshake.get("handshake_ms"),
+            "dns_ms": self.handshake.get("dns_ms"),
+            "warmup_seconds": round(warmup_seconds, 3) if self.warmup else 0.0,
+            "warmup_bytes": int(warmup_bytes) if self.warmup else 0,
+            "warmup_mbps": warmup_bps / 1_000_000 if warmup_bps is not None else None,
+            # A test that ends inside its warm-up never reached a steady state
+            "steady_seconds": round(snapshot["elapsed"], 3) if self.warmup_end else 0.0,
+            "steady_mbps": rates["mean"] if self.warmup_end else None,
+            "mbps": rates["mean"],
+            "mbps_window": rates[f"window_{HEADLINE_WINDOW:g}s"],
+            "mbps_ewma": rates["ewma"],
+            "mbps_p50": rates["p50"],
+            "mbps_p90": rates["p90"],
+            "mbps_p99": rates["p99"],
+        }
+        if self.converge is not None:
+            result["early_stop"] = self.converge.report(elapsed, total_bytes, self.fixed_bytes, snapshot["mean"])
+        if self.profiler is not None and self.profiler.enabled:
+            result["profile"] = self.profiler.report()
+        result.update(extra)
+        if self.exporter is not None:
+            self.export_bytes(total_bytes)
+            self.exporter.record_result(result)
+        return result
+
+
+class DownloadTest(SpeedTest):
+    direction = "download"
+    fixed_bytes = TEST_BYTES
+
+    def __init__(self, url=TEST_URL, streams=DOWNLOAD_STREAMS, adaptive=True,
+                 chunk_size=STREAM_CHUNK_SIZE, reader="readinto", **kwargs):
+        super().__init__(**kwargs)
+        self.url = url
+        self.streams = streams
+        self.adaptive = adaptive
+        self.chunk_size = chunk_size
+        self.reader = reader
+        self.download = None
+
+    def run(self, on_progress=None):
+        download = self.download = MultiStreamDownload(
+            self.url, streams=self.streams, adaptive=self.adaptive, chunk_size=self.chunk_size, reader=self.reader,
+            profiler=self.profiler)
+        started = time.time()
+        self.begin_load()
+        try:
+            download.start()
+        except OSError:
+            self.end_load()
+            raise
+        self.handshake = download.pool.handshake_stats()
+        start_time = time.perf_counter()
+        try:
+            while self.running:
+                self._wake.wait(self.interval)
+                bps, per_stream_bps = download.sample()
+                if not download.streams:
+                    raise download.last_error or RuntimeError("All download streams closed")
+                total = download.total_bytes
+                elapsed = time.perf_counter() - start_time
+                finished = self.done(elapsed, total)
+                warming_up = self.warming_up(elapsed, total, download.restart_estimate, finished)
+                self.record_tick(bps, total)
+                if on_progress:
+                    on_progress(self.with_diagnostics({
+                        "type": "progress",
+                        "direction": self.direction,
+                        "mbps": bps / 1_000_000,
+                        "bytes": total,
+                        "per_stream_mbps": [b / 1_000_000 for b in per_stream_bps],
+                        "warmup": warming_up,
+                    }))
+                if finished:
+                    break
+        finally:
+            download.stop()
+            latency = self.end_load()
+        return self.result(started, download.stats(), time.perf_counter() - start_time, download.total_bytes,
+                           url=self.url, streams=len(download.streams), **latency)
+
+
+class MultiProcessTest(SpeedTest):
+    # Download or upload spread over worker processes (process_pool.py), for
+    # links one Python process cannot saturate. Streams are fixed per process;
+    # the adaptive stream controller and per-thread profiling stay in-process.
+    def __init__(self, direction="download", url=None, processes=None, streams=None, chunk_size=None,
+                 total=None, **kwargs):
+        from .process_pool import DEFAULT_PROCESSES, STREAMS_PER_PROCESS
+        super().__init__(**kwargs)
+        self.direction = direction
+        self.url = url or (TEST_URL if direction == "download" else UPLOAD_URL)
+        self.processes = processes or DEFAULT_PROCESSES
+        self.streams = streams or STREAMS_PER_PROCESS
+        self.chunk_size = chunk_size
+        self.total = total  # Upload: bytes per POST; workers keep posting until the test ends
+        self.fixed_bytes = TEST_BYTES if direction == "download" else total or UPLOAD_TOTAL
+        self.transfer = None
+
+    def run(self, on_progress=None):
+        from .process_pool import ProcessPoolTransfer
+        transfer = self.transfer = ProcessPoolTransfer(self.direction, self.url, self.processes, self.streams,
+                                                       self.chunk_size, self.total)
+        started = time.time()
+        self.begin_load()
+        try:
+            transfer.start()
+        except OSError as e:
+            self.end_load()
+            if self.direction == "upload":
+                raise ConnectionError(f"{UNREACHABLE_SINK} ({e})") from e
+            raise
+        start_time = time.perf_counter()
+        try:
+            while self.running:
+                self._wake.wait(self.interval)
+                bps, per_process_bps = transfer.sample()
+                if not transfer.active_workers:
+                    raise transfer.last_error or RuntimeError("All transfer workers exited")
+                total = transfer.total_bytes
+                elapsed = time.perf_counter() - start_time
+                finished = self.done(elapsed, total)
+                warming_up = self.warming_up(elapsed, total, transfer.restart_estimate, finished)
+                self.record_tick(bps, total)
+                if on_progress:
+                    on_progress(self.with_diagnostics({
+                        "type": "progress",
+                        "direction": self.direction,
+                        "mbps": bps / 1_000_000,
+                        "bytes": total,
+                        "per_process_mbps": [b / 1_000_000 for b in per_process_bps],
+                        "warmup": warming_up,
+                    }))
+                if finished:
+                    break
+        finally:
+            transfer.stop()
+            latency = self.end_load()
+        return self.result(started, transfer.stats(), time.perf_counter() - start_time, transfer.total_bytes,
+                           url=self.url, processes=self.processes, streams=self.processes * self.streams,
+                           **latency)
+
+
+class UploadTest(SpeedTest):
+    direction = "upload"
+
+    def __init__(self, url=UPLOAD_URL, total=UPLOAD_TOTAL, chunk_size=UPLOAD_CHUNK_SIZE,
+                 streaming=True, **kwargs):
+        super().__init__(**kwargs)
+        self.url = url
+        self.total = total
+        self.chunk_size = chunk_size
+        self.streaming = streaming  # One chunked POST over a kept-alive connection vs one POST per chunk
+        self.fixed_bytes = total
+        self.upload = None
+        self.estimator = ThroughputEstimator()
+        self.total_bytes = 0  # The estimator restarts after the warm-up; this does not
+        self.start_time = None
+
+    def stop(self):
+        super().stop()
+        if self.upload is not None:
+            self.upload.stop()
+
+    def run(self, on_progress=None):
+        started = time.time()
+        self.begin_load()
+        try:
+            if self.streaming:
+                extra = self.run_streaming(on_progress)
+            else:
+                extra = self.run_chunked_posts(on_progress)
+        finally:
+            latency = self.end_load()
+        elapsed = time.perf_counter() - self.start_time if self.start_time is not None else 0.0
+        return self.result(started, self.estimator.snapshot(), elapsed, self.total_bytes,
+                           url=self.url, **extra, **latency)
+
+    def progress(self, on_progress, now):
+        # Called once per tick; returns True when the test should stop
+        elapsed = now - self.start_time
+        finished = self.done(elapsed, self.total_bytes)
+        warming_up = self.warming_up(elapsed, self.total_bytes, lambda: self.estimator.reset(now), finished)
+        bps = self.estimator.rate(HEADLINE_WINDOW, now)
+        self.record_tick(bps, self.total_bytes)
+        if on_progress:
+            on_progress(self.with_diagnostics({
+                "type": "progress",
+                "direction": self.direction,
+                "mbps": bps / 1_000_000,
+                "bytes": self.total_bytes,
+                "warmup": warming_up,
+            }))
+        return finished
+
+    def run_streaming(self, on_progress):
+        upload = self.upload = StreamingUpload(self.url, self.total, self.chunk_size, profiler=self.profiler)
+        for attempt in range(3):
+            try:
+                connect_start = time.perf_counter()
+                upload.connect()
+                self.handshake = {"handshake_ms": (time.perf_counter() - connect_start) * 1000}
+                break
+            except OSError:
+                if attempt == 2 or not self.running:
+                    raise ConnectionError(UNREACHABLE_SINK)
+                time.sleep(1)
+        upload.running = self.running
+        estimator = self.estimator
+        start_time = self.start_time = time.perf_counter()
+        last_update = start_time
+        estimator.start(start_time)
+        try:
+            for sent in upload.send():
+                now = time.perf_counter()
+                estimator.add(sent, now)
+                self.total_bytes += sent
+                if now - last_update >= self.interval:
+                    last_update = now
+                    if self.progress(on_progress, now):
+                        upload.stop()
+        finally:
+            upload.close()
+        return {"server": upload.server_report}
+
+    def run_chunked_posts(self, on_progress):
+        import requests  # Imported on use so that starting the engine doesn't pay for it
+        estimator = self.estimator
+        start_time = self.start_time = time.perf_counter()
+        last_update = start_time
+        estimator.start(start_time)
+        first_chunk = True
+        retry_count = 0
+        while self.running and self.total_bytes < self.total:
+            chunk = os.urandom(self.chunk_size)
+            profiler = self.profiler if self.profiler is not None and self.profiler.enabled else None
+            try:
+                # POST a single chunk each time
+                posted = time.perf_counter()
+                requests.post(self.url, data=chunk, headers={'Content-Type': 'application/octet-stream'}, timeout=5)
+                if profiler is not None:
+                    profiler.thread().io(posted, time.perf_counter(), len(chunk))
+                first_chunk = False
+                retry_count = 0
+            except Exception:
+                if first_chunk and retry_count < 3:
+                    retry_count += 1
+                    time.sleep(1)
+                    continue
+                raise ConnectionError(UNREACHABLE_SINK)
+            self.total_bytes += len(chunk)
+            now = time.perf_counter()
+            estimator.add(len(chunk), now)
+            if now - last_update >= self.interval:
+                last_update = now
+                if self.progress(on_progress, now):
+                    break
+            del chunk  # Free memory
+            time.sleep(0.01)  # Reduce CPU usage
+        return {}
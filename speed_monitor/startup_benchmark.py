@@ -0,0 +1,156 @@
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import statistics
+import subprocess
+from .launcher import STARTUP_CHECK
+from .speed_benchmark import free_port, ROOT
+
+# Import-time and startup benchmark for every entry point. Each measurement is
+# a fresh interpreter, repeated and reduced to the median:
+#
+#   import ms    `import <module>` minus an empty interpreter's start-up
+#   startup ms   launch until the entry point is usable: the GUI window is up
+#                (STARTUP_CHECK makes it quit there), the sink accepts a
+#                connection, the CLI has parsed its arguments (--help)
+#   heavy        which optional heavyweight modules the import pulled in
+#
+#   python -m speed_monitor startup
+#   python -m speed_monitor startup --runs 10 --json
+#   python -m speed_monitor startup --frozen dist/active_speed_monitor   # PyInstaller build too
+
+DEFAULT_RUNS = 5
+HEAVY_MODULES = ("PyQt6", "tkinter", "requests", "http.server", "multiprocessing")
+FROZEN_PATH = os.path.join(ROOT, "dist", "active_speed_monitor" + (".exe" if os.name == "nt" else ""))
+START_TIMEOUT = 30.0
+
+
+def entry_points():
+    # name -> (module imported by the entry point, launcher argv, how to tell it is up)
+    return {
+        "gui": ("speed_monitor.gui.qt_app", ["gui"], "exit"),
+        "gui --server": ("speed_monitor.sink_server", ["gui", "--server"], "listen"),
+        "tk": ("speed_monitor.gui.tk_app", ["tk"], "exit"),
+        "cli": ("speed_monitor.speed_cli", ["cli", "--help"], "exit"),
+        "sink": ("speed_monitor.sink_server", ["sink"], "listen"),
+    }
+
+
+def environment():
+    env = dict(os.environ, **{STARTUP_CHECK: "1"})
+    if os.name == "posix" and not env.get("DISPLAY") and not env.get("WAYLAND_DISPLAY"):
+        env.setdefault("QT_QPA_PLATFORM", "offscreen")  # Headless: Qt still builds its window
+    env["PYTHONPATH"] = os.pathsep.join(p for p in (ROOT, env.get("PYTHONPATH")) if p)
+    return env
+
+
+def last_line(stderr):
+    lines = stderr.decode(errors="replace").strip().splitlines()
+    return lines[-1] if lines else "failed"
+
+
+def timed(command, env, ready="exit", port=None):
+    # Seconds from launch until the process exits (ready="exit") or accepts on `port`
+    start = time.perf_counter()
+    process = subprocess.Popen(command, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    try:
+        if ready == "exit":
+            _, stderr = process.communicate(timeout=START_TIMEOUT)
+            if process.returncode != 0:
+                raise RuntimeError(last_line(stderr))
+            return time.perf_counter() - start
+        deadline = start + START_TIMEOUT
+        while time.perf_counter() < deadline:
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=0.05).close()
+                return time.perf_counter() - start
+            except OSError:
+                if process.poll() is not None:
+                    raise RuntimeError(last_line(process.stderr.read()))
+                time.sleep(0.002)
+        raise RuntimeError("did not start listening")
+    finally:
+        if process.poll() is None:
+            process.terminate()
+            process.wait()
+
+
+def median_seconds(runs, command, env, ready="exit", port=None):
+    return statistics.median(timed(command, env, ready, port) for _ in range(runs))
+
+
+def loaded_modules(module, env):
+    # Number of modules loaded by `import module`, and the heavy ones among them
+    code = (f"import sys, json, {module}; "
+            f"print(json.dumps([len(sys.modules), [m for m in {HEAVY_MODULES!r} if m in sys.modules]]))")
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout)
+
+
+def measure(name, module, argv, ready, runs, env, baseline):
+    row = {"entry_point": name, "module": module}
+    try:
+        row["import_ms"] = max(0.0, median_seconds(runs, [sys.executable, "-c", f"import {module}"], env)
+                               - baseline) * 1000
+        row["modules"], row["heavy"] = loaded_modules(module, env)
+        port = free_port() if ready == "listen" else None
+        command = [sys.executable, "-m", "speed_monitor", *argv] + ([str(port)] if port else [])
+        row["startup_ms"] = median_seconds(runs, command, env, ready, port) * 1000
+    except (RuntimeError, subprocess.SubprocessError) as e:
+        row["error"] = str(e)
+    return row
+
+
+def measure_frozen(path, runs, env):
+    # The PyInstaller build from active_speed_monitor.spec (the Tk window)
+    row = {"entry_point": "frozen tk", "module": os.path.relpath(path, ROOT)}
+    if not os.path.exists(path):
+        row["error"] = "not built (pyinstaller active_speed_monitor.spec)"
+        return row
+    try:
+        row["startup_ms"] = median_seconds(runs, [path], env) * 1000
+    except (RuntimeError, subprocess.SubprocessError) as e:
+        row["error"] = str(e)
+    return row
+
+
+def format_row(row):
+    def fmt(value, width, spec):
+        return f"{'-' if value is None else format(value, spec):>{width}}"
+    text = (f"{row['entry_point']:<16}{fmt(row.get('import_ms'), 12, '.1f')}{fmt(row.get('startup_ms'), 12, '.1f')}"
+            f"{fmt(row.get('modules'), 10, 'd')}  {', '.join(row.get('heavy', [])) or '-'}")
+    return text + (f"  ({row['error']})" if "error" in row else "")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m speed_monitor startup",
+                                     description="Measure import time and startup time of each entry point.")
+    parser.add_argument("--runs", type=int, default=DEFAULT_RUNS, help="Launches per measurement (median)")
+    parser.add_argument("--only", nargs="+", metavar="ENTRY", help="Measure only these entry points")
+    parser.add_argument("--frozen", nargs="?", const=FROZEN_PATH, metavar="PATH",
+                        help="Also time the PyInstaller executable (default: dist/active_speed_monitor)")
+    parser.add_argument("--json", action="store_true", help="Print JSON lines instead of a table")
+    args = parser.parse_args(argv)
+    available = entry_points()
+    names = args.only or list(available)
+    unknown = [n for n in names if n not in available]
+    if unknown:
+        parser.error(f"unknown entry point(s): {', '.join(unknown)}; choose from {', '.join(available)}")
+    env = environment()
+    baseline = median_seconds(args.runs, [sys.executable, "-c", "pass"], env)
+    if not args.json:
+        print(f"{'entry point':<16}{'import ms':>12}{'startup ms':>12}{'modules':>10}  heavy imports")
+    rows = (measure(name, *available[name], args.runs, env, baseline) for name in names)
+    for row in rows:
+        print(json.dumps(row) if args.json else format_row(row), flush=True)
+    if args.frozen:
+        row = measure_frozen(args.frozen, args.runs, env)
+        print(json.dumps(row) if args.json else format_row(row), flush=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,435 @@
+import os
+import json
+import time
+import socket
+import threading
+import http.client
+from urllib.parse import urlsplit
+from .estimator import ThroughputEstimator, WINDOWS, HEADLINE_WINDOW
+
+TEST_BYTES = 200_000_000  # 200 MB
+TEST_URL = f"https://speed.cloudflare.com/__down?bytes={TEST_BYTES}"
+UPLOAD_URL = "http://127.0.0.1:8000/"  # Local endpoint for upload test (use IP to avoid DNS issues)
+UPLOAD_CHUNK_SIZE = 2 * 1024 * 1024  # 2 MB per chunked-encoding frame
+UPLOAD_TOTAL = 200 * 1024 * 1024  # 200 MB
+STREAM_CHUNK_SIZE = 128 * 1024  # 128 KB read buffer per stream, allocated once
+READERS = ("readinto", "iter_content")  # Zero-copy socket reads, or the older requests path
+DOWNLOAD_STREAMS = 4  # Streams opened at the start of a test
+MIN_STREAMS = 1
+MAX_STREAMS = 16
+PROBE_INTERVAL = 2.0  # Seconds between stream-count adjustments
+GROWTH_THRESHOLD = 0.05  # An extra stream must add at least 5% to stay
+
+
+def open_connection(parts, timeout):
+    cls = http.client.HTTPSConnection if parts.scheme == "https" else http.client.HTTPConnection
+    return cls(parts.hostname, parts.port, timeout=timeout)
+
+
+class ConnectionPool:
+    # Keeps HTTP(S) connections to one origin alive across requests and streams,
+    # and times DNS and connection setup (TCP + TLS) as it opens them, so those
+    # costs can be reported on their own instead of inside the transfer rate.
+    def __init__(self, url, timeout=10):
+        self.parts = urlsplit(url)
+        self.timeout = timeout
+        self.lock = threading.Lock()
+        self.idle = []
+        self.closed = False
+        self.dns_time = None
+        self.connect_times = []
+
+    def resolve(self):
+        start = time.perf_counter()
+        port = self.parts.port or (443 if self.parts.scheme == "https" else 80)
+        socket.getaddrinfo(self.parts.hostname, port, type=socket.SOCK_STREAM)
+        self.dns_time = time.perf_counter() - start
+
+    def connect(self):
+        conn = open_connection(self.parts, self.timeout)
+        start = time.perf_counter()
+        conn.connect()
+        elapsed = time.perf_counter() - start
+        with self.lock:
+            self.connect_times.append(elapsed)
+        return conn
+
+    def acquire(self):
+        # Returns (connection, reused)
+        with self.lock:
+            if self.idle:
+                return self.idle.pop(), True
+        return self.connect(), False
+
+    def release(self, conn):
+        with self.lock:
+            if conn.sock is not None and not self.closed:
+                self.idle.append(conn)
+                return
+        conn.close()
+
+    def prewarm(self, count):
+        # Open `count` connections in parallel ahead of the measurement
+        if self.dns_time is None:
+            self.resolve()
+        results = []
+        def open_one():
+            try:
+                results.append(self.connect())
+            except OSError as e:
+                results.append(e)
+        threads = [threading.Thread(target=open_one, daemon=True) for _ in range(count)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join(self.timeout)
+        errors = [r for r in results if isinstance(r, Exception)]
+        for conn in results:
+            if not isinstance(conn, Exception):
+                self.release(conn)
+        if errors and len(errors) == len(results):
+            raise errors[0]
+
+    def handshake_stats(self):
+        with self.lock:
+            times = sorted(self.connect_times)
+        return {
+            "dns_ms": self.dns_time * 1000 if self.dns_time is not None else None,
+            "handshake_ms": times[len(times) // 2] * 1000 if times else None,
+            "connections": len(times),
+        }
+
+    def close(self):
+        with self.lock:
+            self.closed = True
+            idle, self.idle = self.idle, []
+        for conn in idle:
+            conn.close()
+
+
+class DownloadStream:
+    # One HTTP flow that keeps re-requesting the test file until stopped.
+    # The "readinto" reader receives straight into one preallocated buffer, so a
+    # stream's memory never exceeds chunk_size however fast the link is, and
+    # bytes are counted per socket read. "iter_content" is the previous
+    # requests-based path, which allocates a new bytes object for every chunk.
+    def __init__(self, index, url, chunk_size, on_bytes, reader="readinto", pool=None, profiler=None):
+        self.index = index
+        self.url = url
+        self.pool = pool or ConnectionPool(url)
+        self.profiler = profiler  # self_profile.ClientProfiler, or None
+        self.chunk_size = chunk_size
+        self.on_bytes = on_bytes
+        self.reader = reader
+        self.running = True
+        self.bytes = 0
+        self.error = None
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def run(self):
+        try:
+            if self.reader == "iter_content":
+                self.run_iter_content()
+            else:
+                self.run_readinto()
+        except Exception as e:
+            self.error = e
+        self.running = False
+
+    def run_readinto(self):
+        parts = urlsplit(self.url)
+        path = (parts.path or "/") + ("?" + parts.query if parts.query else "")
+        view = memoryview(bytearray(self.chunk_size))
+        conn = None
+        try:
+            while self.running:
+                if conn is None:
+                    conn, reused = self.pool.acquire()
+                try:
+                    conn.request("GET", path, headers={"Accept-Encoding": "identity"})
+                    response = conn.getresponse()
+                except (http.client.RemoteDisconnected, ConnectionError):
+                    conn.close()
+                    conn = None
+                    if reused:
+                        continue  # The server dropped an idle pooled connection: open a fresh one
+                    raise
+                reused = True
+                if response.status != 200:
+                    # The unread error body would be left on the connection: don't pool it
+                    conn.close()
+                    conn = None
+                    raise http.client.HTTPException(f"{response.status} {response.reason} for {self.url}")
+                profiler = self.profiler
+                while self.running:
+                    if profiler is not None and profiler.enabled:
+                        started = time.perf_counter()
+                        n = response.readinto(view)
+                        profiler.thread().io(started, time.perf_counter(), n)
+                    else:
+                        n = response.readinto(view)
+                    if not n:
+                        break
+                    self.bytes += n
+                    self.on_bytes(n)
+                if not self.running or response.will_close:
+                    # Stopped mid-body, or the server won't keep the connection alive
+                    conn.close()
+                    conn = None
+        finally:
+            if conn is not None:
+                self.pool.release(conn)
+
+    def run_iter_content(self):
+        import requests  # Only this legacy reader needs it; it costs ~90 ms to import
+        while self.running:
+            with requests.get(self.url, stream=True, timeout=10) as r:
+                r.raise_for_status()
+                profiler = self.profiler
+                mark = time.perf_counter()
+                for chunk in r.iter_content(chunk_size=self.chunk_size):
+                    if profiler is not None and profiler.enabled:
+                        # Time inside the iterator is the read
+                        profiler.thread().io(mark, time.perf_counter(), len(chunk))
+                    if not self.running:
+                        break
+                    self.bytes += len(chunk)
+                    self.on_bytes(len(chunk))
+                    if profiler is not None:
+                        mark = time.perf_counter()
+
+    def stop(self):
+        self.running = False
+
+
+class MultiStreamDownload:
+    # Runs N concurrent download streams against the same URL. The aggregate rate
+    # comes from a shared ThroughputEstimator fed by every stream; per-stream
+    # rates are measured between calls to sample().
+    # With adaptive=True, streams are added while the aggregate keeps growing
+    # and the last one is dropped again once it stops paying for itself.
+    def __init__(self, url=TEST_URL, streams=DOWNLOAD_STREAMS, adaptive=True,
+                 min_streams=MIN_STREAMS, max_streams=MAX_STREAMS, chunk_size=STREAM_CHUNK_SIZE,
+                 reader="readinto", pool=None, profiler=None):
+        self.url = url
+        self.reader = reader
+        self.pool = pool or ConnectionPool(url)
+        self.profiler = profiler
+        self.initial_streams = max(min_streams, min(streams, max_streams))
+        self.adaptive = adaptive
+        self.min_streams = min_streams
+        self.max_streams = max_streams
+        self.chunk_size = chunk_size
+        self.streams = []
+        self.retiring = []  # Dropped streams whose thread may still be inside a read
+        self.retired_bytes = 0  # Bytes from streams that were dropped mid-test
+        self.last_error = None
+        self.lock = threading.Lock()
+        self.estimator = ThroughputEstimator(windows=sorted(set(WINDOWS) | {PROBE_INTERVAL}))
+        self._next_index = 0
+        self._last_sample = None
+        self._last_stream_bytes = {}
+        # Adaptive controller state
+        self._probe_start = None
+        self._baseline_bps = None
+        self._probing = False
+        self._saturated = False
+
+    @property
+    def total_bytes(self):
+        return self.retired_bytes + sum(s.bytes for s in self.streams) + sum(s.bytes for s in self.retiring)
+
+    @property
+    def active_streams(self):
+        return sum(1 for s in self.streams if s.running)
+
+    def start(self):
+        # Connections are opened before the clock starts, so handshakes never count
+        self.pool.prewarm(self.initial_streams)
+        now = time.perf_counter()
+        self._last_sample = now
+        self._probe_start = now
+        self.estimator.start(now)
+        for _ in range(self.initial_streams):
+            self.add_stream()
+
+    def restart_estimate(self):
+        # Drops everything measured so far from the rate estimates (end of warm-up);
+        # total_bytes still counts it
+        now = time.perf_counter()
+        with self.lock:
+            self.estimator.reset(now)
+        self._probe_start = now
+        self._baseline_bps = None
+        self._probing = False
+
+    def stop(self):
+        for s in self.streams:
+            s.stop()
+        self.pool.close()
+
+    def join(self, timeout=None):
+        for s in self.streams + self.retiring:
+            s.thread.join(timeout)
+
+    def add_stream(self):
+        s = DownloadStream(self._next_index, self.url, self.chunk_size, self.record, self.reader, self.pool,
+                           self.profiler)
+        self._next_index += 1
+        self.streams.append(s)
+        self._last_stream_bytes[s.index] = 0
+        s.thread.start()
+        return s
+
+    def drop_stream(self):
+        if len(self.streams) <= self.min_streams:
+            return None
+        s = self.streams.pop()
+        s.stop()
+        # Its last read can still land: the bytes are folded in once the thread exits
+        self.retiring.append(s)
+        self._last_stream_bytes.pop(s.index, None)
+        return s
+
+    def record(self, nbytes):
+        # Called from every stream thread for each chunk received
+        with self.lock:
+            self.estimator.add(nbytes)
+
+    def stats(self):
+        with self.lock:
+            return self.estimator.snapshot()
+
+    def sample(self):
+        # Returns (headline aggregate_bps, [per_stream_bps since the last call])
+        now = time.perf_counter()
+        elapsed = now - self._last_sample if self._last_sample else 0
+        self._last_sample = now
+        per_stream = []
+        for s in list(self.streams):
+            current = s.bytes
+            delta = current - self._last_stream_bytes.get(s.index, 0)
+            self._last_stream_bytes[s.index] = current
+            per_stream.append(delta * 8 / elapsed if elapsed > 0 else 0.0)
+            if not s.running and s.error is not None:
+                self.last_error = s.error
+        self._reap_dead_streams()
+        with self.lock:
+            aggregate = self.estimator.rate(HEADLINE_WINDOW, now)
+        if self.adaptive:
+            self._adjust(now)
+        return aggregate, per_stream
+
+    def _reap_dead_streams(self):
+        for s in [s for s in self.streams if not s.running]:
+            self.streams.remove(s)
+            self.retired_bytes += s.bytes
+            self._last_stream_bytes.pop(s.index, None)
+        for s in [s for s in self.retiring if not s.thread.is_alive()]:
+            self.retiring.remove(s)
+            self.retired_bytes += s.bytes
+
+    def _adjust(self, now):
+        if now - self._probe_start < PROBE_INTERVAL:
+            return
+        with self.lock:
+            bps = self.estimator.rate(PROBE_INTERVAL, now)
+        self._probe_start = now
+        if self._probing:
+            self._probing = False
+            if bps < self._baseline_bps * (1 + GROWTH_THRESHOLD):
+                # The extra stream did not raise the aggregate: give it back
+                self.drop_stream()
+                self._saturated = True
+                self._baseline_bps = bps
+                return
+        elif self._saturated and self._baseline_bps and bps < self._baseline_bps * (1 - 4 * GROWTH_THRESHOLD):
+            # Aggregate fell well below the level we settled at; try growing again
+            self._saturated = False
+        self._baseline_bps = bps
+        if not self._saturated and len(self.streams) < self.max_streams:
+            self.add_stream()
+            self._probing = True
+
+
+_payload_buffers = {}
+
+def payload_buffer(size):
+    # Random bytes generated once per size and reused for every chunk of every upload
+    buf = _payload_buffers.get(size)
+    if buf is None:
+        buf = _payload_buffers[size] = os.urandom(size)
+    return buf
+
+
+class StreamingUpload:
+    # Sends `total` bytes as a single chunked POST over one keep-alive connection.
+    # Every frame is a memoryview slice of the same pre-generated buffer, and
+    # bytes_sent counts what the socket actually accepted, not finished requests.
+    def __init__(self, url=UPLOAD_URL, total=UPLOAD_TOTAL, chunk_size=UPLOAD_CHUNK_SIZE, timeout=5,
+                 profiler=None):
+        parts = urlsplit(url)
+        self.https = parts.scheme == "https"
+        self.host = parts.hostname
+        self.port = parts.port
+        self.path = (parts.path or "/") + ("?" + parts.query if parts.query else "")
+        self.total = total
+        self.chunk_size = chunk_size
+        self.timeout = timeout
+        self.payload = memoryview(payload_buffer(chunk_size))
+        self.running = True
+        self.bytes_sent = 0
+        self.status = None
+        self.server_report = None  # What the sink says it received, if it reports it
+        self.conn = None
+        self.profiler = profiler  # self_profile.ClientProfiler, or None
+
+    def connect(self):
+        if self.conn is None:
+            cls = http.client.HTTPSConnection if self.https else http.client.HTTPConnection
+            self.conn = cls(self.host, self.port, timeout=self.timeout)
+            self.conn.connect()
+        return self.conn
+
+    def send(self):
+        # Generator yielding the byte count of every accepted socket send
+        conn = self.connect()
+        conn.putrequest("POST", self.path, skip_accept_encoding=True)
+        conn.putheader("Content-Type", "application/octet-stream")
+        conn.putheader("Transfer-Encoding", "chunked")
+        conn.endheaders()
+        sock = conn.sock
+        remaining = self.total
+        while self.running and remaining > 0:
+            size = min(self.chunk_size, remaining)
+            sock.sendall(b"%x\r\n" % size)
+            view = self.payload[:size]
+            while view:
+                profiler = self.profiler
+                if profiler is not None and profiler.enabled:
+                    started = time.perf_counter()
+                    sent = sock.send(view)
+                    profiler.thread().io(started, time.perf_counter(), sent)
+                else:
+                    sent = sock.send(view)
+                view = view[sent:]
+                self.bytes_sent += sent
+                yield sent
+            sock.sendall(b"\r\n")
+            remaining -= size
+        sock.sendall(b"0\r\n\r\n")
+        response = conn.getresponse()
+        body = response.read()
+        self.status = response.status
+        if response.getheader("Content-Type", "").startswith("application/json"):
+            self.server_report = json.loads(body)
+        if response.will_close:
+            self.close()
+
+    def stop(self):
+        self.running = False
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
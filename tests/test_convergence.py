@@ -0,0 +1,90 @@
+import unittest
+from speed_monitor.estimator import ConvergenceDetector
+from speed_monitor.speed_engine import SpeedTest
+
+TICK = 0.5  # Seconds between progress ticks
+MB = 1_000_000
+
+
+class ConvergenceDetectorTest(unittest.TestCase):
+    def run_ticks(self, detector, rates_mbps):
+        # Feeds one tick per rate; returns the elapsed time at which the detector stopped, or None
+        elapsed, total = 0.0, 0
+        detector.update(elapsed, total)
+        for mbps in rates_mbps:
+            elapsed += TICK
+            total += int(mbps * MB / 8 * TICK)
+            if detector.update(elapsed, total):
+                return elapsed
+        return None
+
+    def test_converges_on_steady_rate(self):
+        detector = ConvergenceDetector(min_duration=3.0, max_duration=None)
+        stopped = self.run_ticks(detector, [100] * 40)
+        self.assertEqual(detector.reason, "converged")
+        self.assertEqual(stopped, 5.0)  # Needs a full set of interval rates
+        self.assertAlmostEqual(detector.mean / MB, 100, places=3)
+
+    def test_not_before_min_duration(self):
+        detector = ConvergenceDetector(min_duration=8.0, max_duration=None)
+        self.assertEqual(self.run_ticks(detector, [100] * 40), 8.0)
+
+    def test_noisy_rate_runs_to_max_duration(self):
+        detector = ConvergenceDetector(max_duration=10.0)
+        self.assertEqual(self.run_ticks(detector, [20, 180] * 20), 10.0)
+        self.assertEqual(detector.reason, "max_duration")
+
+    def test_max_bytes(self):
+        detector = ConvergenceDetector(max_duration=None, max_bytes=20 * MB)
+        self.run_ticks(detector, [20, 180] * 20)
+        self.assertEqual(detector.reason, "max_bytes")
+
+    def test_report_savings_only_when_converged(self):
+        detector = ConvergenceDetector(min_duration=3.0, max_duration=None)
+        self.run_ticks(detector, [100] * 40)
+        report = detector.report(5.0, 62_500_000, 200_000_000, 100 * MB)
+        self.assertEqual(report["bytes_saved"], 137_500_000)
+        self.assertAlmostEqual(report["seconds_saved"], 11.0)
+        capped = ConvergenceDetector(max_duration=10.0)
+        self.run_ticks(capped, [20, 180] * 20)
+        report = capped.report(10.0, 125_000_000, 200_000_000, 100 * MB)
+        self.assertEqual((report["reason"], report["bytes_saved"], report["seconds_saved"]), ("max_duration", 0, 0.0))
+
+
+class SpeedTestDoneTest(unittest.TestCase):
+    def run_test(self, test, rates_mbps):
+        # Drives done()/warming_up() the way the measurement loops do; returns the stopping tick
+        elapsed, total = 0.0, 0
+        for mbps in rates_mbps:
+            elapsed += TICK
+            total += int(mbps * MB / 8 * TICK)
+            finished = test.done(elapsed, total)
+            test.warming_up(elapsed, total, lambda: None, finished)
+            if finished:
+                return elapsed, total
+        return None
+
+    def test_converged(self):
+        test = SpeedTest(duration=30.0, converge=ConvergenceDetector(max_duration=30.0))
+        elapsed, _ = self.run_test(test, [100] * 100)
+        self.assertEqual(test.converge.reason, "converged")
+        self.assertLess(elapsed, 30.0)
+
+    def test_duration_cap_is_reported(self):
+        test = SpeedTest(duration=10.0, converge=ConvergenceDetector(max_duration=10.0))
+        self.assertEqual(self.run_test(test, [20, 180] * 100)[0], 10.0)
+        self.assertEqual(test.converge.reason, "max_duration")
+
+    def test_size_cap_is_reported(self):
+        test = SpeedTest(duration=30.0, max_bytes=50 * MB, converge=ConvergenceDetector(max_bytes=50 * MB))
+        self.assertGreaterEqual(self.run_test(test, [20, 180] * 100)[1], 50 * MB)
+        self.assertEqual(test.converge.reason, "max_bytes")
+
+    def test_cap_during_warmup(self):
+        test = SpeedTest(duration=1.0, warmup=2.0, converge=ConvergenceDetector(max_duration=1.0))
+        self.assertEqual(self.run_test(test, [100] * 10)[0], 1.0)
+        self.assertEqual(test.converge.reason, "max_duration")
+
+
+if __name__ == "__main__":
+    unittest.main()
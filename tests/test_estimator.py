@@ -0,0 +1,68 @@
+import unittest
+from speed_monitor.estimator import ThroughputEstimator
+
+TICK = 0.005  # Seconds between simulated chunks
+
+
+def feed(estimator, now, seconds, mbps):
+    # Simulated traffic at a steady rate (0 = idle) for `seconds`; returns the new clock
+    end = now + seconds
+    while now < end - 1e-9:
+        now = round(now + TICK, 6)
+        if mbps:
+            estimator.add(mbps * 1_000_000 / 8 * TICK, now)
+    return now
+
+
+class ThroughputEstimatorTest(unittest.TestCase):
+    def setUp(self):
+        self.estimator = ThroughputEstimator()
+        self.estimator.start(0.0)
+
+    def mbps(self, window, now):
+        return self.estimator.rate(window, now) / 1_000_000
+
+    def test_steady_rate(self):
+        now = feed(self.estimator, 0.0, 15, 100)
+        self.assertAlmostEqual(self.mbps(2.0, now), 100, places=3)
+        self.assertAlmostEqual(self.mbps(10.0, now), 100, places=3)
+        self.assertAlmostEqual(self.estimator.mean(now) / 1_000_000, 100, places=3)
+
+    def test_rate_before_window_fills(self):
+        now = feed(self.estimator, 0.0, 1, 100)
+        self.assertAlmostEqual(self.mbps(2.0, now), 100, places=3)
+
+    def test_gap_counts_as_zero_rate(self):
+        now = feed(self.estimator, 0.0, 15, 100)
+        now = feed(self.estimator, now, 5, 0)
+        now = feed(self.estimator, now, 1, 100)
+        self.assertAlmostEqual(self.mbps(2.0, now), 50, places=3)
+        self.assertAlmostEqual(self.mbps(10.0, now), 50, places=3)
+
+    def test_long_gap_then_short_burst(self):
+        now = feed(self.estimator, 0.0, 100, 0)
+        now = feed(self.estimator, now, 0.5, 100)
+        self.assertAlmostEqual(self.mbps(2.0, now), 25, places=3)
+        self.assertAlmostEqual(self.mbps(10.0, now), 5, places=3)
+
+    def test_stall_decays(self):
+        now = feed(self.estimator, 0.0, 15, 100)
+        now = feed(self.estimator, now, 3, 0)
+        self.assertEqual(self.mbps(2.0, now), 0)
+        self.assertEqual(self.estimator.instantaneous(now), 0)
+
+    def test_percentiles(self):
+        now = feed(self.estimator, 0.0, 10, 100)
+        snapshot = self.estimator.snapshot(now)
+        self.assertAlmostEqual(snapshot["p50"] / 1_000_000, 100, delta=4)  # Within a 4% histogram bucket
+        self.assertEqual(snapshot["total_bytes"], self.estimator.total_bytes)
+
+    def test_reset(self):
+        feed(self.estimator, 0.0, 2, 100)
+        self.estimator.reset()
+        self.assertEqual(self.estimator.rate(2.0, 5.0), 0.0)
+        self.assertEqual(self.estimator.percentile(50), 0.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
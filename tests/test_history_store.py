@@ -0,0 +1,110 @@
+import os
+import math
+import tempfile
+import unittest
+from unittest import mock
+from speed_monitor.history_store import HistoryStore, HistoryWriter, DOWNLOAD, UPLOAD
+
+
+class HistoryStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "history.bin")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_query_range_and_direction(self):
+        store = HistoryStore(self.path)
+        for i in range(100):
+            store.append(1000.0 + i, "download" if i % 2 else "upload", 1e6 * i, 10, 0.02)
+        records = list(store.query(1010, 1020))
+        self.assertEqual([r.timestamp for r in records], [1010.0 + i for i in range(10)])
+        self.assertEqual(len(list(store.query(1010, 1020, "download"))), 5)
+        self.assertEqual(records[0].latency, 0.02)
+        store.close()
+
+    def test_clock_step_back_keeps_order(self):
+        store = HistoryStore(self.path)
+        store.append(2000.0, DOWNLOAD, 1.0)
+        store.append(1990.0, DOWNLOAD, 2.0)
+        self.assertEqual([r.timestamp for r in store.query()], [2000.0, 2000.0])
+        store.close()
+
+    def test_rollups_include_open_buckets(self):
+        store = HistoryStore(self.path)
+        for i in range(150):
+            store.append(6000.0 + i, DOWNLOAD, 10.0 + i % 3, 100, math.nan if i % 2 else 0.01)
+        rows = store.rollup(60)
+        self.assertEqual([(r.start, r.count) for r in rows], [(6000.0, 60), (6060.0, 60), (6120.0, 30)])
+        self.assertEqual((rows[0].rate_min, rows[0].rate_max, rows[0].bytes), (10.0, 12.0, 6000))
+        self.assertEqual(rows[0].latency_count, 30)
+        self.assertEqual(sum(r.count for r in store.rollup(3600)), 150)
+        store.close()
+
+    def test_reopen_merges_bucket(self):
+        store = HistoryStore(self.path)
+        store.append(6000.0, DOWNLOAD, 10.0, 100)
+        store.close()
+        store = HistoryStore(self.path)
+        store.append(6030.0, DOWNLOAD, 20.0, 100)
+        store.close()
+        rows = HistoryStore(self.path, readonly=True).rollup(60)
+        self.assertEqual([(r.start, r.count, r.bytes) for r in rows], [(6000.0, 2, 200)])
+
+    def test_reader_sees_later_appends(self):
+        writer = HistoryStore(self.path)
+        reader = HistoryStore(self.path, readonly=True)
+        self.assertEqual(list(reader.query()), [])
+        for i in range(50_000):  # Enough to grow the file past its first 1 MB
+            writer.append(1000.0 + i, UPLOAD, 1.0)
+        self.assertEqual(len(list(reader.query(50_990))), 10)
+        reader.close()
+        writer.close()
+
+    def test_two_writers_share_a_file(self):
+        first, second = HistoryStore(self.path), HistoryStore(self.path)
+        for i in range(200):
+            first.append(6000.0 + i, DOWNLOAD, 1.0, 10)
+            second.append(6000.0 + i, UPLOAD, 1.0, 10)
+        second.close()
+        first.close()
+        store = HistoryStore(self.path, readonly=True)
+        records = list(store.query())
+        self.assertEqual(len(records), 400)
+        self.assertEqual(sorted(r.timestamp for r in records), [r.timestamp for r in records])
+        rows = store.rollup(60)
+        self.assertEqual(sum(r.count for r in rows), 400)
+        self.assertEqual(sorted((r.start, r.direction) for r in rows), [(r.start, r.direction) for r in rows])
+        self.assertEqual(len(rows), len({(r.start, r.direction) for r in rows}))
+        store.close()
+
+
+class HistoryWriterTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "history.bin")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_records_in_background(self):
+        writer = HistoryWriter(self.path)
+        for i in range(100):
+            writer.record(1000.0 + i, "download", 1.0, 10)
+        writer.close()
+        self.assertIsNone(writer.problem())
+        store = HistoryStore(self.path, readonly=True)
+        self.assertEqual(len(list(store.query())), 100)
+        store.close()
+
+    def test_reports_write_errors(self):
+        writer = HistoryWriter(self.path)
+        with mock.patch.object(writer.store, "append", side_effect=OSError("disk full")):
+            writer.record(1000.0, "download", 1.0)
+            writer.close()
+        self.assertEqual(writer.problem(), "history not recorded: disk full")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+import time
+import socket
+import threading
+import unittest
+from speed_monitor.latency import LatencyProber, summarize, probe_url
+from speed_monitor.sink_server import make_server
+
+
+class LatencyProberTest(unittest.TestCase):
+    def test_probes_local_origin(self):
+        server = make_server("127.0.0.1", 0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        prober = LatencyProber(f"http://127.0.0.1:{server.server_address[1]}/__down?bytes=1000", interval=0.02)
+        try:
+            self.assertTrue(prober.url.endswith("/__down?bytes=0"))
+            prober.start()
+            time.sleep(0.3)
+            prober.begin_load("download")
+            time.sleep(0.3)
+            summary = prober.loaded_summary()
+        finally:
+            prober.stop()
+            server.shutdown()
+            server.server_close()
+        self.assertEqual(summary["phase"], "download")
+        self.assertGreater(summary["idle"]["samples"], 0)
+        self.assertGreater(summary["loaded"]["samples"], 0)
+        self.assertIsNone(prober.conn)
+
+    def test_stop_without_waiting(self):
+        # A server that accepts but never answers: the probe blocks until its timeout
+        listener = socket.create_server(("127.0.0.1", 0))
+        prober = LatencyProber(f"http://127.0.0.1:{listener.getsockname()[1]}/", timeout=1.0)
+        try:
+            prober.start()
+            time.sleep(0.2)
+            started = time.perf_counter()
+            prober.stop(wait=False)
+            self.assertLess(time.perf_counter() - started, 0.1)
+            prober.thread.join(3)
+            self.assertFalse(prober.thread.is_alive())
+            self.assertIsNone(prober.conn)  # Closed by the probing thread on its way out
+        finally:
+            listener.close()
+
+
+class SummarizeTest(unittest.TestCase):
+    def test_summary(self):
+        summary = summarize([0.010, 0.030, 0.020], [0.05], 1)
+        self.assertEqual(summary["samples"], 3)
+        self.assertEqual(summary["lost"], 1)
+        self.assertAlmostEqual(summary["rtt_ms"], 20.0)
+        self.assertAlmostEqual(summary["rtt_min_ms"], 10.0)
+        self.assertAlmostEqual(summary["jitter_ms"], 15.0)
+        self.assertAlmostEqual(summary["ttfb_ms"], 50.0)
+
+    def test_probe_url(self):
+        self.assertEqual(probe_url("https://speed.cloudflare.com/__down?bytes=200000000"),
+                         "https://speed.cloudflare.com/__down?bytes=0")
+        self.assertEqual(probe_url("http://127.0.0.1:8000/"), "http://127.0.0.1:8000/")
+
+
+if __name__ == "__main__":
+    unittest.main()
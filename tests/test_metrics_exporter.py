@@ -0,0 +1,52 @@
+import threading
+import unittest
+from speed_monitor.metrics_exporter import MetricsExporter
+
+URL = "https://speed.example.net/__down"
+
+
+class MetricsExporterTest(unittest.TestCase):
+    def test_byte_counter_survives_full_queue(self):
+        exporter = MetricsExporter(max_pending=10)
+        for _ in range(100):
+            exporter.add_bytes(URL, "download", 1000)
+            exporter.observe_throughput(URL, "download", 50_000_000)
+        text = exporter.render().decode()
+        self.assertIn('speed_monitor_bytes_total{target="speed.example.net",direction="download"} 100000', text)
+        # Only the histogram samples are bounded
+        self.assertIn('speed_monitor_throughput_bits_per_second_count{target="speed.example.net",direction="download"} 10',
+                      text)
+
+    def test_producer_threads_sum_without_sharing_a_counter(self):
+        exporter = MetricsExporter()
+        release = threading.Event()
+
+        def produce(direction, wait):
+            for _ in range(1000):
+                exporter.add_bytes(URL, direction, 10)
+            if wait:
+                release.wait()
+        finished = [threading.Thread(target=produce, args=("download", False)) for _ in range(3)]
+        running = threading.Thread(target=produce, args=("upload", True))
+        for thread in finished + [running]:
+            thread.start()
+        for thread in finished:
+            thread.join()
+        totals = exporter.byte_totals()
+        self.assertEqual(totals, {("speed.example.net", "download"): 30_000, ("speed.example.net", "upload"): 10_000})
+        self.assertEqual(len(exporter.counters), 1)  # The exited producers were folded in
+        release.set()
+        running.join()
+        self.assertEqual(exporter.byte_totals(), totals)
+        self.assertEqual(exporter.counters, set())
+
+    def test_openmetrics_counter_family(self):
+        exporter = MetricsExporter()
+        exporter.add_bytes(URL, "upload", 5)
+        text = exporter.render(openmetrics=True).decode()
+        self.assertIn("# TYPE speed_monitor_bytes counter", text)
+        self.assertTrue(text.endswith("# EOF\n"))
+
+
+if __name__ == "__main__":
+    unittest.main()
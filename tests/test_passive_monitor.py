@@ -0,0 +1,71 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+from speed_monitor.passive_monitor import counter_delta, parse_proc_net_dev, ProcNetDev, COUNTER_32
+
+PAGE = 4096
+
+PROC_NET_DEV = (
+    b"Inter-|   Receive                                                |  Transmit\n"
+    b" face |bytes    packets errs drop fifo frame compressed multicast|bytes    packets errs drop fifo colls "
+    b"carrier compressed\n"
+    b"    lo: 429203391123 8841841    0    0    0     0          0         0 429203391123 8841841    0    0    0"
+    b"     0       0          0\n"
+    b"  eth0:1234567    1000    0    0    0     0          0         0   765432     900    0    0    0     0"
+    b"       0          0\n")
+
+
+class CounterDeltaTest(unittest.TestCase):
+    def test_increase(self):
+        self.assertEqual(counter_delta(1000, 1500), 500)
+        self.assertEqual(counter_delta(1000, 1000), 0)
+
+    def test_32_bit_wrap(self):
+        self.assertEqual(counter_delta(COUNTER_32 - 100, 50), 150)
+
+    def test_reset_of_small_counter(self):
+        # A wrap would mean ~4 GB in one sample: the interface was reset instead
+        self.assertEqual(counter_delta(1_000_000, 500), 500)
+
+    def test_reset_of_64_bit_counter(self):
+        self.assertEqual(counter_delta(COUNTER_32 * 10, 500), 500)
+
+
+class ParseProcNetDevTest(unittest.TestCase):
+    def test_parse(self):
+        self.assertEqual(parse_proc_net_dev(PROC_NET_DEV),
+                         {"lo": (429203391123, 429203391123), "eth0": (1234567, 765432)})
+
+    def test_headers_only(self):
+        self.assertEqual(parse_proc_net_dev(PROC_NET_DEV.split(b"\n", 2)[0] + b"\n"), {})
+
+
+class ProcNetDevTest(unittest.TestCase):
+    def test_file_larger_than_a_page(self):
+        interfaces = {f"veth{i:04d}": (i * 1000, i * 2000) for i in range(300)}
+        lines = [f"{name}: {rx} 1 0 0 0 0 0 0 {tx} 1 0 0 0 0 0 0" for name, (rx, tx) in interfaces.items()]
+        data = b"\n".join(PROC_NET_DEV.split(b"\n")[:2]) + b"\n" + "\n".join(lines).encode() + b"\n"
+        self.assertGreater(len(data), 2 * PAGE)
+        with tempfile.NamedTemporaryFile() as f:
+            f.write(data)
+            f.flush()
+            source = ProcNetDev(f.name)
+            pread = os.pread
+            # Like a /proc seq_file: never more than a page per call
+            with mock.patch("os.pread", lambda fd, size, offset: pread(fd, min(size, PAGE), offset)):
+                self.assertEqual(source.read(), interfaces)
+            source.close()
+
+    @unittest.skipUnless(os.path.exists("/proc/net/dev"), "Linux only")
+    def test_live_proc_net_dev(self):
+        source = ProcNetDev()
+        try:
+            with open("/proc/net/dev", "rb") as f:
+                self.assertEqual(set(source.read()), set(parse_proc_net_dev(f.read())))
+        finally:
+            source.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+import time
+import socket
+import threading
+import unittest
+from speed_monitor.sink_server import make_server
+from speed_monitor.process_pool import ProcessPoolTransfer, RUNNING, DONE
+
+
+class ProcessPoolTransferTest(unittest.TestCase):
+    # Spawned workers against the in-repo sink and /__down origin
+    @classmethod
+    def setUpClass(cls):
+        cls.server = make_server("127.0.0.1", 0)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base = f"http://127.0.0.1:{cls.server.server_address[1]}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def run_pool(self, pool, seconds=1.0):
+        pool.start()
+        try:
+            self.assertEqual(list(pool.status), [RUNNING] * pool.processes)
+            time.sleep(seconds)
+            _, per_process = pool.sample()
+        finally:
+            pool.stop()
+        self.assertFalse(any(worker.is_alive() for worker in pool.workers))
+        return per_process
+
+    def check_counters(self, pool, per_process):
+        self.assertEqual(len(per_process), 2)
+        self.assertTrue(all(bps > 0 for bps in per_process))
+        self.assertGreater(pool.total_bytes, 0)
+        self.assertEqual(pool.total_bytes, sum(pool.counters))
+        self.assertEqual(pool.total_bytes, pool.worker_bytes(0) + pool.worker_bytes(1))
+        self.assertEqual(list(pool.status), [DONE, DONE])
+        self.assertIsNone(pool.last_error)
+
+    def test_download(self):
+        pool = ProcessPoolTransfer("download", f"{self.base}/__down?bytes={10 ** 12}&rate=50",
+                                   processes=2, streams=1)
+        self.check_counters(pool, self.run_pool(pool))
+
+    def test_upload(self):
+        pool = ProcessPoolTransfer("upload", self.base + "/", processes=2, streams=1,
+                                   chunk_size=64 * 1024, total=1024 * 1024)
+        self.check_counters(pool, self.run_pool(pool))
+
+    def test_unreachable_url(self):
+        with socket.socket() as s:
+            s.bind(("127.0.0.1", 0))
+            port = s.getsockname()[1]  # Nothing listens here once it is closed
+        pool = ProcessPoolTransfer("download", f"http://127.0.0.1:{port}/", processes=2, streams=1)
+        with self.assertRaises(ConnectionError):
+            pool.start()
+        self.assertFalse(any(worker.is_alive() for worker in pool.workers))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+import time
+import threading
+import unittest
+from speed_monitor.self_profile import ClientProfiler
+from speed_monitor.sink_server import make_server
+from speed_monitor.speed_engine import DownloadTest, UploadTest
+
+
+class ClientProfilerTest(unittest.TestCase):
+    def test_exited_thread_is_counted_once_then_dropped(self):
+        profiler = ClientProfiler(enabled=True)
+
+        def transfer():
+            for _ in range(50):
+                started = time.perf_counter()
+                sum(range(2000))
+                profiler.thread("transfer").io(started, time.perf_counter(), 1000)
+        thread = threading.Thread(target=transfer)
+        thread.start()
+        thread.join()
+        time.sleep(0.01)
+        snapshot = profiler.snapshot()
+        self.assertEqual([t["chunks"] for t in snapshot["threads"]], [50])
+        self.assertGreaterEqual(snapshot["threads"][0]["cpu_pct"], 0.0)
+        self.assertEqual(profiler.threads, set())
+        time.sleep(0.01)
+        self.assertEqual(profiler.snapshot()["threads"], [])
+
+    def test_disabled(self):
+        profiler = ClientProfiler()
+        self.assertIsNone(profiler.snapshot())
+        self.assertIsNone(profiler.report())
+
+
+class ProfiledTestsTest(unittest.TestCase):
+    # A download and then an upload sharing one profiler, as `speed_cli.py both --profile` runs them
+    def setUp(self):
+        self.server = make_server("127.0.0.1", 0)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def check_profile(self, result):
+        profile = result["profile"]
+        self.assertGreater(profile["samples"], 0)
+        self.assertGreaterEqual(profile["peak_thread_cpu_pct"], 0.0)
+        self.assertGreater(profile["io_pct"], 0.0)
+
+    def test_download_then_upload(self):
+        profiler = ClientProfiler(enabled=True)
+        download = DownloadTest(f"{self.base}/__down?bytes={10 ** 12}&rate=100", streams=2, adaptive=False,
+                                duration=1.0, warmup=0.2, interval=0.1, profiler=profiler)
+        self.check_profile(download.run())
+        profiler.reset()
+        upload = UploadTest(self.base + "/", total=10 ** 12, duration=1.0, warmup=0.2, interval=0.1,
+                            profiler=profiler)
+        result = upload.run()
+        self.check_profile(result)
+        self.assertEqual(result["server"]["bytes"], result["bytes"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+import io
+import json
+import threading
+import http.client
+import unittest
+from speed_monitor.sink_server import SinkHandler, SinkStats, make_server
+
+
+def handler_for(data, buffer_size=16):
+    # A SinkHandler reading `data`, without a socket; a tiny buffer exercises partial reads
+    handler = SinkHandler.__new__(SinkHandler)
+    handler.rfile = io.BytesIO(data)
+    handler.stats = SinkStats()
+    handler.buffer = bytearray(buffer_size)
+    handler.view = memoryview(handler.buffer)
+    return handler
+
+
+class ChunkedParserTest(unittest.TestCase):
+    def test_chunks(self):
+        handler = handler_for(b"5\r\nhello\r\n1a\r\n" + b"x" * 26 + b"\r\n0\r\n\r\nNEXT")
+        self.assertEqual(handler.drain_chunked(), 31)
+        self.assertEqual(handler.stats.total_bytes, 31)
+        self.assertEqual(handler.rfile.read(), b"NEXT")  # The next request on the connection is untouched
+
+    def test_extensions_and_trailers(self):
+        handler = handler_for(b"4;name=value\r\nbody\r\n0\r\nChecksum: abc\r\nOther: 1\r\n\r\nNEXT")
+        self.assertEqual(handler.drain_chunked(), 4)
+        self.assertEqual(handler.rfile.read(), b"NEXT")
+
+    def test_bare_newlines(self):
+        handler = handler_for(b"3\nabc\n0\n\n")
+        self.assertEqual(handler.drain_chunked(), 3)
+
+    def test_truncated_body(self):
+        with self.assertRaises(ValueError):
+            handler_for(b"10\r\nshort").drain_chunked()
+        with self.assertRaises(ValueError):
+            handler_for(b"3\r\nabc\r\n").drain_chunked()
+
+    def test_bad_chunk_size(self):
+        with self.assertRaises(ValueError):
+            handler_for(b"zz\r\nabc\r\n0\r\n\r\n").drain_chunked()
+
+    def test_content_length(self):
+        handler = handler_for(b"y" * 100 + b"NEXT")
+        self.assertEqual(handler.drain(100), 100)
+        self.assertEqual(handler.rfile.read(), b"NEXT")
+
+
+class SinkServerTest(unittest.TestCase):
+    def setUp(self):
+        self.server = make_server("127.0.0.1", 0)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.conn = http.client.HTTPConnection("127.0.0.1", self.server.server_address[1], timeout=5)
+
+    def tearDown(self):
+        self.conn.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def post(self, body, **kwargs):
+        self.conn.request("POST", "/", body=body, **kwargs)
+        return json.loads(self.conn.getresponse().read())
+
+    def test_chunked_upload_on_kept_alive_connection(self):
+        chunks = [b"a" * 1000, b"b" * 70_000, b"c"]
+        self.assertEqual(self.post(iter(chunks), encode_chunked=True)["bytes"], 71_001)
+        self.assertEqual(self.post(b"d" * 5000)["bytes"], 5000)
+        self.conn.request("GET", "/stats")
+        stats = json.loads(self.conn.getresponse().read())
+        self.assertEqual((stats["total_bytes"], stats["requests"]), (76_001, 2))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,166 @@
+import time
+import threading
+import unittest
+from speed_monitor.sink_server import make_server
+from speed_monitor.transfer import MultiStreamDownload, DownloadStream, ConnectionPool, StreamingUpload, PROBE_INTERVAL
+
+ENDLESS = 10 ** 12  # Bytes: downloads that only end when stopped
+
+
+class OriginTestCase(unittest.TestCase):
+    # The in-repo sink and /__down origin on a free loopback port
+    @classmethod
+    def setUpClass(cls):
+        cls.server = make_server("127.0.0.1", 0)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base = f"http://127.0.0.1:{cls.server.server_address[1]}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def down_url(self, nbytes=ENDLESS, **params):
+        return f"{self.base}/__down?bytes={nbytes}" + "".join(f"&{k}={v}" for k, v in params.items())
+
+
+class MultiStreamDownloadTest(OriginTestCase):
+    def run_download(self, download, seconds, interval=0.1):
+        # Samples like DownloadTest does; returns the last per-stream rates
+        per_stream = []
+        deadline = time.perf_counter() + seconds
+        while time.perf_counter() < deadline:
+            time.sleep(interval)
+            _, per_stream = download.sample()
+        return per_stream
+
+    def test_streams_and_totals(self):
+        download = MultiStreamDownload(self.down_url(rate=100), streams=3, adaptive=False)
+        download.start()
+        try:
+            per_stream = self.run_download(download, 0.6)
+        finally:
+            download.stop()
+            download.join(5)
+        download.sample()
+        self.assertEqual(len(per_stream), 3)
+        self.assertTrue(all(bps > 0 for bps in per_stream))
+        self.assertEqual(download.total_bytes, download.estimator.total_bytes)
+        self.assertEqual(download.pool.handshake_stats()["connections"], 3)  # Prewarmed before the clock started
+
+    def test_drop_counts_the_last_read(self):
+        download = MultiStreamDownload(self.down_url(), streams=3, adaptive=False)
+        download.start()
+        try:
+            time.sleep(0.3)
+            download.drop_stream()
+            download.drop_stream()
+            self.assertIsNone(download.drop_stream())  # Never below min_streams
+            self.run_download(download, 0.3)
+        finally:
+            download.stop()
+            download.join(5)
+        download.sample()
+        self.assertEqual(download.retiring, [])
+        self.assertEqual(download.total_bytes, download.estimator.total_bytes)
+
+    def test_adds_streams_while_the_aggregate_grows(self):
+        # Each connection is capped at 40 Mbps, so every extra stream raises the aggregate
+        download = MultiStreamDownload(self.down_url(rate=40), streams=1, max_streams=3)
+        download.start()
+        try:
+            self.run_download(download, 2 * PROBE_INTERVAL + 0.5)
+            self.assertEqual(len(download.streams), 3)
+        finally:
+            download.stop()
+            download.join(5)
+
+    def test_drops_a_stream_that_adds_nothing(self):
+        # The controller alone, fed a flat aggregate rate
+        download = MultiStreamDownload(self.down_url(), streams=2)
+        added, dropped = [], []
+        download.add_stream = lambda: (added.append(1), download.streams.append(object()))
+        download.drop_stream = lambda: (dropped.append(1), download.streams.pop())
+        download.streams = [object(), object()]
+        download.estimator.rate = lambda window, now=None: 100e6
+        download._probe_start = 0.0
+        download._adjust(PROBE_INTERVAL)  # Baseline taken, a third stream is probed
+        self.assertEqual((len(added), len(download.streams)), (1, 3))
+        download._adjust(2 * PROBE_INTERVAL)  # No gain: it is given back, and growth stops
+        self.assertEqual((len(dropped), len(download.streams)), (1, 2))
+        download._adjust(3 * PROBE_INTERVAL)
+        self.assertEqual(len(added), 1)
+        download.estimator.rate = lambda window, now=None: 50e6
+        download._adjust(4 * PROBE_INTERVAL)  # The aggregate fell well below the baseline: probe again
+        self.assertEqual(len(added), 2)
+
+
+class DownloadStreamTest(OriginTestCase):
+    def start_stream(self, url, chunk_size=16 * 1024):
+        pool = ConnectionPool(url)
+        reads = []
+        stream = DownloadStream(0, url, chunk_size, reads.append, pool=pool)
+        stream.thread.start()
+        return stream, pool, reads
+
+    def test_rerequests_over_one_pooled_connection(self):
+        stream, pool, reads = self.start_stream(self.down_url(100_000))
+        deadline = time.perf_counter() + 5
+        while stream.bytes < 1_000_000 and time.perf_counter() < deadline:
+            time.sleep(0.01)
+        stream.stop()
+        stream.thread.join(5)
+        self.assertIsNone(stream.error)
+        self.assertGreaterEqual(stream.bytes, 1_000_000)  # Ten bodies or more
+        self.assertEqual(sum(reads), stream.bytes)
+        self.assertLessEqual(max(reads), 16 * 1024)  # Every read lands in the one preallocated buffer
+        self.assertEqual(len(pool.connect_times), 1)
+
+    def test_stop_mid_body_closes_the_connection(self):
+        stream, pool, _ = self.start_stream(self.down_url())
+        time.sleep(0.2)
+        stream.stop()
+        stream.thread.join(5)
+        self.assertFalse(stream.thread.is_alive())
+        self.assertEqual(pool.idle, [])  # A half-read response must not go back to the pool
+
+    def test_error_status(self):
+        stream, pool, _ = self.start_stream(self.base + "/missing")
+        stream.thread.join(5)
+        self.assertIn("404", str(stream.error))
+        self.assertEqual(pool.idle, [])
+
+class StreamingUploadTest(OriginTestCase):
+    def test_sink_receives_every_byte(self):
+        upload = StreamingUpload(self.base + "/", total=5 * 1024 * 1024, chunk_size=1024 * 1024)
+        sends = list(upload.send())
+        upload.close()
+        self.assertEqual(sum(sends), 5 * 1024 * 1024)
+        self.assertTrue(all(0 < n <= 1024 * 1024 for n in sends))
+        self.assertEqual(upload.bytes_sent, 5 * 1024 * 1024)
+        self.assertEqual(upload.status, 200)
+        self.assertEqual(upload.server_report["bytes"], 5 * 1024 * 1024)
+
+    def test_send_again_over_the_same_connection(self):
+        upload = StreamingUpload(self.base + "/", total=256 * 1024, chunk_size=64 * 1024)
+        for _ in upload.send():
+            pass
+        conn = upload.conn
+        for _ in upload.send():
+            pass
+        self.assertIs(upload.conn, conn)
+        self.assertEqual(upload.server_report["bytes"], 256 * 1024)
+        upload.close()
+
+    def test_stop_ends_the_body_early(self):
+        upload = StreamingUpload(self.base + "/", total=ENDLESS, chunk_size=64 * 1024)
+        for _ in upload.send():
+            if upload.bytes_sent >= 1024 * 1024:
+                upload.stop()
+        upload.close()
+        self.assertEqual(upload.status, 200)
+        self.assertEqual(upload.server_report["bytes"], upload.bytes_sent)
+
+
+if __name__ == "__main__":
+    unittest.main()